@@ -2,6 +2,14 @@ from flask import Flask
 from app.config import Config
 from app.models import db
 from app.services.cache_service import init_cache
+from app.services.job_queue import init_job_queue
+from app.services.driver_pool import init_driver_pool
+from app.services.single_flight import init_single_flight
+from app.services.rate_limiter import init_rate_limiter
+from app.services.rankings import init_rankings
+from app.services.search import init_search
+from app.services.taxonomy import init_taxonomy
+from app.services.scraper import create_chrome_driver
 
 
 def create_app(config_class=Config):
@@ -12,10 +20,27 @@ def create_app(config_class=Config):
     # initialize extensions
     db.init_app(app)
     init_cache(app)
+    init_job_queue(app)
+    init_driver_pool(app, factory=create_chrome_driver)
+    init_single_flight(app)
+    init_rate_limiter(app)
+    init_rankings(app)
+    init_search(app)
+    init_taxonomy(app)
     
     # register blueprints
     from app.routes.pages import pages_bp
+    from app.routes.jobs import jobs_bp
+    from app.routes.leaderboards import leaderboards_bp
+    from app.routes.search import search_bp
+    from app.routes.facets import facets_bp
+    from app.routes.export import export_bp
     app.register_blueprint(pages_bp)
+    app.register_blueprint(jobs_bp)
+    app.register_blueprint(leaderboards_bp)
+    app.register_blueprint(search_bp)
+    app.register_blueprint(facets_bp)
+    app.register_blueprint(export_bp)
     
     # health check endpoint
     @app.route('/health')
@@ -36,7 +61,16 @@ def create_app(config_class=Config):
                 'employees': '/api/pages/<page_id>/employees',
                 'followers': '/api/pages/<page_id>/followers',
                 'summary': '/api/pages/<page_id>/summary',
-                'scrape': '/api/pages/<page_id>/scrape (POST)'
+                'stats': '/api/pages/<page_id>/stats',
+                'analytics': '/api/pages/<page_id>/analytics?days=',
+                'scrape': '/api/pages/<page_id>/scrape (POST)',
+                'batch_scrape': '/api/pages/batch-scrape (POST)',
+                'job_status': '/api/jobs/<job_id>',
+                'leaderboards': '/api/leaderboards/?metric=&industry=',
+                'page_ranks': '/api/leaderboards/pages/<page_id>',
+                'search': '/api/search?q=&type=page|post',
+                'facets': '/api/facets',
+                'export': '/api/export/pages|posts|employees|followers.ndjson'
             }
         }
     
@@ -19,12 +19,72 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_key_change_in_production')
     
     # cache settings
-    CACHE_TYPE = 'simple'
+    # SimpleCache is per process; use RedisCache + CACHE_REDIS_URL to share one cache between workers
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'linkedin_insights:')
     CACHE_DEFAULT_TIMEOUT = 300  # 5 minutes
+    # GET /api/pages/<page_id> caches the page and its posts/employees slices separately
+    PAGE_CACHE_TIMEOUT = 300
+    PAGE_POSTS_CACHE_TIMEOUT = 120
+    PAGE_EMPLOYEES_CACHE_TIMEOUT = 600
+    # past their TTL, page entries are served stale for this long while a background re-read runs
+    PAGE_CACHE_STALE_TIMEOUT = 3600
+    # pages last scraped longer ago than this are re-scraped in the background when read (0 disables)
+    PAGE_FRESHNESS_WINDOW = int(os.getenv('PAGE_FRESHNESS_WINDOW', 86400))
+    CACHE_REFRESH_WORKERS = 2
+    ANALYTICS_CACHE_TIMEOUT = 600
+    ANALYTICS_MAX_DAYS = 365
+    # leaderboards older than this are rebuilt in the background on read; `flask rebuild-rankings` forces it
+    LEADERBOARD_MAX_AGE = 900
+    LEADERBOARD_MAX_LIMIT = 100
+    SEARCH_MAX_LIMIT = 50
+    FACETS_CACHE_TIMEOUT = 3600
+    FACETS_MAX_LIMIT = 200
+    # in-process L1 in front of a shared backend
+    CACHE_L1_TIMEOUT = 5
+    CACHE_L1_MAX_ENTRIES = 1000
+    LISTING_CACHE_TIMEOUT = 60
+    LISTING_TOTAL_TIMEOUT = 3600
     
     # openai for bonus feature
     OPENAI_API_KEY = os.getenv('OPENAI_API_KEY', '')
     
+    # scrape job queue
+    SCRAPE_WORKERS = int(os.getenv('SCRAPE_WORKERS', 4))
+    SCRAPE_JOB_HISTORY = 500
+    # finished jobs stay readable from every worker for SCRAPE_JOB_TTL seconds;
+    # a job holds its page for at most SCRAPE_JOB_TIMEOUT before another can be queued
+    SCRAPE_JOB_TTL = 3600
+    SCRAPE_JOB_TIMEOUT = 600
+    SCRAPE_QUEUE_EAGER = False
+    
+    # batch scraping
+    BATCH_SCRAPE_CONCURRENCY = int(os.getenv('BATCH_SCRAPE_CONCURRENCY', 4))
+    BATCH_SCRAPE_MAX_CONCURRENCY = 8
+    BATCH_SCRAPE_MAX_PAGES = 500
+    
+    # requests per second allowed against one domain (0 disables) and burst size
+    SCRAPE_DOMAIN_RATE = float(os.getenv('SCRAPE_DOMAIN_RATE', 0.5))
+    SCRAPE_DOMAIN_BURST = 3
+    
+    # scrape de-duplication: 'local' (per process) or 'db' (scrape_locks table)
+    SCRAPE_LOCK_BACKEND = os.getenv('SCRAPE_LOCK_BACKEND', 'local')
+    SCRAPE_LOCK_TTL = 300
+    SCRAPE_WAIT_TIMEOUT = 120
+    
+    # headless chrome pool used by the scraper
+    CHROME_POOL_SIZE = int(os.getenv('CHROME_POOL_SIZE', 2))
+    CHROME_MAX_USES = int(os.getenv('CHROME_MAX_USES', 50))
+    CHROME_ACQUIRE_TIMEOUT = 120
+    
+    # fetch the about/posts/people sections of a page at the same time;
+    # needs CHROME_POOL_SIZE >= 3 to run all three at once
+    SCRAPER_PARALLEL_SECTIONS = os.getenv('SCRAPER_PARALLEL_SECTIONS', 'false').lower() == 'true'
+    
     # pagination defaults
     DEFAULT_PAGE_SIZE = 10
-    MAX_PAGE_SIZE = 50
\ No newline at end of file
+    MAX_PAGE_SIZE = 50
+    
+    # rows fetched per round trip by the streaming NDJSON exports
+    EXPORT_BATCH_SIZE = 1000
\ No newline at end of file
@@ -1,26 +1,124 @@
 import re
+import json
+import math
+import base64
+from datetime import datetime
 from flask import jsonify
+from sqlalchemy import and_, asc, desc, or_
 
 
-def paginate_query(query, page=1, per_page=10, max_per_page=50):
+def paginate_query(query, page=1, per_page=10, max_per_page=50, total=None):
     """
     Helper function to paginate SQLAlchemy queries.
     Returns paginated results with metadata.
+    Pass a known total (e.g. from cache) to skip the COUNT query.
     """
     page = max(1, page)
     per_page = min(max(1, per_page), max_per_page)
     
-    pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    if total is None:
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        items, total = pagination.items, pagination.total
+    else:
+        items = query.limit(per_page).offset((page - 1) * per_page).all()
+    
+    total_pages = int(math.ceil(total / float(per_page))) if total else 0
     
     return {
-        'items': pagination.items,
+        'items': items,
         'pagination': {
             'page': page,
             'per_page': per_page,
-            'total_items': pagination.total,
-            'total_pages': pagination.pages,
-            'has_next': pagination.has_next,
-            'has_prev': pagination.has_prev
+            'total_items': total,
+            'total_pages': total_pages,
+            'has_next': page < total_pages,
+            'has_prev': page > 1
+        }
+    }
+
+
+def encode_cursor(sort_value, row_id):
+    """Build an opaque cursor from the last row's sort key and id"""
+    if isinstance(sort_value, datetime):
+        sort_value = {'dt': sort_value.isoformat()}
+    raw = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if isinstance(sort_value, dict):
+            sort_value = datetime.fromisoformat(sort_value['dt'])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    
+    # bool is an int subclass but never a valid key
+    if not isinstance(row_id, int) or isinstance(row_id, bool):
+        raise ValueError("Invalid cursor")
+    
+    if sort_value is not None and (
+        isinstance(sort_value, bool) or not isinstance(sort_value, (int, float, str, datetime))
+    ):
+        raise ValueError("Invalid cursor")
+    
+    return sort_value, row_id
+
+
+def keyset_paginate(query, id_column, sort_column=None, cursor=None, per_page=10,
+                    max_per_page=50, descending=True):
+    """
+    Cursor based pagination on (sort_column, id_column).
+    Unlike paginate_query it skips the COUNT and the OFFSET, so deep
+    pages cost the same as the first one. An empty cursor starts at the
+    beginning. NULL sort values come last, as MySQL and SQLite order
+    them in descending sorts.
+    """
+    per_page = min(max(1, per_page), max_per_page)
+    
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        
+        after_id = id_column < last_id if descending else id_column > last_id
+        
+        if sort_column is None:
+            query = query.filter(after_id)
+        elif last_value is None:
+            # NULLs sort last descending and first ascending
+            condition = and_(sort_column.is_(None), after_id)
+            if not descending:
+                condition = or_(condition, sort_column.isnot(None))
+            query = query.filter(condition)
+        else:
+            after_value = sort_column < last_value if descending else sort_column > last_value
+            condition = or_(after_value, and_(sort_column == last_value, after_id))
+            if descending:
+                condition = or_(condition, sort_column.is_(None))
+            query = query.filter(condition)
+    
+    direction = desc if descending else asc
+    order = [direction(id_column)]
+    if sort_column is not None:
+        order.insert(0, direction(sort_column))
+    
+    rows = query.order_by(*order).limit(per_page + 1).all()
+    items = rows[:per_page]
+    has_next = len(rows) > per_page
+    
+    next_cursor = None
+    if has_next:
+        last = items[-1]
+        last_value = getattr(last, sort_column.key) if sort_column is not None else None
+        next_cursor = encode_cursor(last_value, getattr(last, id_column.key))
+    
+    return {
+        'items': items,
+        'pagination': {
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': has_next
         }
     }
 
@@ -60,13 +158,15 @@ def parse_follower_range(range_str):
     return min_val, max_val
 
 
-def format_response(data, message="Success", status_code=200):
+def format_response(data, message="Success", status_code=200, meta=None):
     """Standard response formatter"""
     response = {
         'status': 'success' if status_code < 400 else 'error',
         'message': message,
         'data': data
     }
+    if meta is not None:
+        response['meta'] = meta
     return jsonify(response), status_code
 
 
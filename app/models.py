@@ -11,6 +11,31 @@ page_followers = db.Table('page_followers',
 )
 
 
+# junction table for the normalized specialities of a page
+page_specialities = db.Table('page_specialities',
+    db.Column('page_id', db.Integer, db.ForeignKey('pages.id'), primary_key=True),
+    db.Column('speciality_id', db.Integer, db.ForeignKey('specialities.id'), primary_key=True, index=True)
+)
+
+
+class Industry(db.Model):
+    """Lookup table of industries; key is the lowercased name"""
+    __tablename__ = 'industries'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    key = db.Column(db.String(255), unique=True, nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+
+
+class Speciality(db.Model):
+    """Lookup table of specialities; key is the lowercased name"""
+    __tablename__ = 'specialities'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    key = db.Column(db.String(255), unique=True, nullable=False)
+    name = db.Column(db.String(255), nullable=False)
+
+
 class Page(db.Model):
     """Model representing a LinkedIn company page"""
     __tablename__ = 'pages'
@@ -24,51 +49,82 @@ class Page(db.Model):
     description = db.Column(db.Text, nullable=True)
     website = db.Column(db.String(500), nullable=True)
     industry = db.Column(db.String(255), nullable=True)
-    follower_count = db.Column(db.Integer, default=0)
+    follower_count = db.Column(db.Integer, default=0, index=True)
     employee_count = db.Column(db.Integer, default=0)
     specialities = db.Column(db.Text, nullable=True)
     headquarters = db.Column(db.String(500), nullable=True)
     founded_year = db.Column(db.Integer, nullable=True)
     company_type = db.Column(db.String(100), nullable=True)
     
+    # normalized industry and specialities; the text columns above are kept as scraped
+    industry_id = db.Column(db.Integer, db.ForeignKey('industries.id'), nullable=True)
+    
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # hash of the last stored scrape and when the page was last scraped
+    content_hash = db.Column(db.String(64), nullable=True)
+    last_checked_at = db.Column(db.DateTime, nullable=True)
+    
     # relationships
     posts = db.relationship('Post', backref='page', lazy='dynamic', cascade='all, delete-orphan')
     employees = db.relationship('User', backref='company', lazy='dynamic', foreign_keys='User.company_id')
     followers = db.relationship('User', secondary=page_followers, lazy='dynamic',
                                backref=db.backref('followed_pages', lazy='dynamic'))
+    industry_entry = db.relationship('Industry')
+    speciality_entries = db.relationship('Speciality', secondary=page_specialities, lazy='dynamic')
     
     def to_dict(self, include_posts=False, include_employees=False):
         """Convert page object to dictionary for JSON response"""
-        result = {
-            'id': self.id,
-            'page_id': self.page_id,
-            'linkedin_id': self.linkedin_id,
-            'name': self.name,
-            'url': self.url,
-            'profile_picture': self.profile_picture,
-            'description': self.description,
-            'website': self.website,
-            'industry': self.industry,
-            'follower_count': self.follower_count,
-            'employee_count': self.employee_count,
-            'specialities': self.specialities.split(',') if self.specialities else [],
-            'headquarters': self.headquarters,
-            'founded_year': self.founded_year,
-            'company_type': self.company_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
-        }
+        result = Page.serialize(self)
         
         if include_posts:
-            result['posts'] = [p.to_dict() for p in self.posts.limit(15).all()]
+            result['posts'] = Page.posts_slice(self.id)
         
         if include_employees:
-            result['employees'] = [e.to_dict() for e in self.employees.limit(20).all()]
+            result['employees'] = Page.employees_slice(self.id)
             
         return result
+    
+    @staticmethod
+    def serialize(row):
+        """Page fields as a dict, from a Page or a row with the same column names"""
+        return {
+            'id': row.id,
+            'page_id': row.page_id,
+            'linkedin_id': row.linkedin_id,
+            'name': row.name,
+            'url': row.url,
+            'profile_picture': row.profile_picture,
+            'description': row.description,
+            'website': row.website,
+            'industry': row.industry,
+            'follower_count': row.follower_count,
+            'employee_count': row.employee_count,
+            'specialities': row.specialities.split(',') if row.specialities else [],
+            'headquarters': row.headquarters,
+            'founded_year': row.founded_year,
+            'company_type': row.company_type,
+            'created_at': row.created_at.isoformat() if row.created_at else None,
+            'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+            'last_checked_at': row.last_checked_at.isoformat() if row.last_checked_at else None
+        }
+    
+    @staticmethod
+    def posts_slice(page_pk, limit=15):
+        """Active posts shown with a page, serialized"""
+        posts = Post.query.filter(Post.page_id == page_pk, Post.retired_at.is_(None)).order_by(Post.id).limit(limit)
+        return [p.to_dict() for p in posts.all()]
+    
+    @staticmethod
+    def employees_slice(page_pk, limit=20):
+        """Employees shown with a page, serialized"""
+        employees = User.query.filter(User.company_id == page_pk).order_by(User.id).limit(limit)
+        return [e.to_dict() for e in employees.all()]
+
+
+# industry-filtered listings are sorted by followers
+db.Index('ix_pages_industry_id_follower_count', Page.industry_id, Page.follower_count)
 
 
 class User(db.Model):
@@ -78,29 +134,34 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     linkedin_id = db.Column(db.String(100), nullable=True)
     username = db.Column(db.String(255), nullable=True)
-    full_name = db.Column(db.String(255), nullable=False)
+    full_name = db.Column(db.String(255), nullable=False, index=True)
     profile_url = db.Column(db.String(500), nullable=True)
     profile_picture = db.Column(db.String(1000), nullable=True)
     headline = db.Column(db.String(500), nullable=True)
     location = db.Column(db.String(255), nullable=True)
     
-    company_id = db.Column(db.Integer, db.ForeignKey('pages.id'), nullable=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('pages.id'), nullable=True, index=True)
     job_title = db.Column(db.String(255), nullable=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def to_dict(self):
+        return User.serialize(self)
+    
+    @staticmethod
+    def serialize(row):
+        """User fields as a dict, from a User or a row with the same column names"""
         return {
-            'id': self.id,
-            'linkedin_id': self.linkedin_id,
-            'username': self.username,
-            'full_name': self.full_name,
-            'profile_url': self.profile_url,
-            'profile_picture': self.profile_picture,
-            'headline': self.headline,
-            'location': self.location,
-            'job_title': self.job_title,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'id': row.id,
+            'linkedin_id': row.linkedin_id,
+            'username': row.username,
+            'full_name': row.full_name,
+            'profile_url': row.profile_url,
+            'profile_picture': row.profile_picture,
+            'headline': row.headline,
+            'location': row.location,
+            'job_title': row.job_title,
+            'created_at': row.created_at.isoformat() if row.created_at else None
         }
 
 
@@ -121,28 +182,43 @@ class Post(db.Model):
     posted_at = db.Column(db.DateTime, nullable=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # set when a refresh no longer finds the post on the page
+    retired_at = db.Column(db.DateTime, nullable=True)
     
     comments = db.relationship('Comment', backref='post', lazy='dynamic', cascade='all, delete-orphan')
     
     def to_dict(self, include_comments=False):
-        result = {
-            'id': self.id,
-            'linkedin_post_id': self.linkedin_post_id,
-            'content': self.content,
-            'post_url': self.post_url,
-            'media_url': self.media_url,
-            'media_type': self.media_type,
-            'like_count': self.like_count,
-            'comment_count': self.comment_count,
-            'share_count': self.share_count,
-            'posted_at': self.posted_at.isoformat() if self.posted_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
+        result = Post.serialize(self)
         
         if include_comments:
             result['comments'] = [c.to_dict() for c in self.comments.limit(10).all()]
             
         return result
+    
+    @staticmethod
+    def serialize(row):
+        """Post fields as a dict, from a Post or a row with the same column names"""
+        return {
+            'id': row.id,
+            'linkedin_post_id': row.linkedin_post_id,
+            'content': row.content,
+            'post_url': row.post_url,
+            'media_url': row.media_url,
+            'media_type': row.media_type,
+            'like_count': row.like_count,
+            'comment_count': row.comment_count,
+            'share_count': row.share_count,
+            'posted_at': row.posted_at.isoformat() if row.posted_at else None,
+            'created_at': row.created_at.isoformat() if row.created_at else None
+        }
+
+
+# a page's posts are always read newest first; scanned backwards it also
+# gives the keyset order (posted_at DESC, id DESC) without a sort
+db.Index('ix_posts_page_id_posted_at_id', Post.page_id, Post.posted_at, Post.id)
+
+# the page detail shows a page's first posts in id order
+db.Index('ix_posts_page_id_id', Post.page_id, Post.id)
 
 
 class Comment(db.Model):
@@ -150,7 +226,7 @@ class Comment(db.Model):
     __tablename__ = 'comments'
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False, index=True)
     author_name = db.Column(db.String(255), nullable=True)
     author_profile_url = db.Column(db.String(500), nullable=True)
     content = db.Column(db.Text, nullable=True)
@@ -159,6 +235,35 @@ class Comment(db.Model):
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    @staticmethod
+    def first_for_posts(post_ids, limit=10):
+        """
+        The first `limit` comments of each post, serialized and grouped by
+        post id, fetched in one windowed query.
+        """
+        if not post_ids:
+            return {}
+        
+        position = db.func.row_number().over(
+            partition_by=Comment.post_id, order_by=Comment.id
+        ).label('position')
+        numbered = (
+            db.select(Comment.id, position)
+            .where(Comment.post_id.in_(post_ids))
+            .subquery()
+        )
+        comments = (
+            Comment.query
+            .join(numbered, numbered.c.id == Comment.id)
+            .filter(numbered.c.position <= limit)
+            .order_by(Comment.post_id, Comment.id)
+        )
+        
+        grouped = dict((post_id, []) for post_id in post_ids)
+        for comment in comments:
+            grouped[comment.post_id].append(comment.to_dict())
+        return grouped
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -167,4 +272,102 @@ class Comment(db.Model):
             'content': self.content,
             'like_count': self.like_count,
             'commented_at': self.commented_at.isoformat() if self.commented_at else None
-        }
\ No newline at end of file
+        }
+
+
+class ScrapeLock(db.Model):
+    """Cross-process lock held while a page is being scraped"""
+    __tablename__ = 'scrape_locks'
+    
+    page_id = db.Column(db.String(255), primary_key=True)
+    owner = db.Column(db.String(100), nullable=False)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+
+class PageStats(db.Model):
+    """Post engagement aggregates for a page, kept up to date on save"""
+    __tablename__ = 'page_stats'
+    
+    page_id = db.Column(db.Integer, db.ForeignKey('pages.id'), primary_key=True)
+    post_count = db.Column(db.Integer, default=0)
+    total_likes = db.Column(db.Integer, default=0)
+    total_comments = db.Column(db.Integer, default=0)
+    total_shares = db.Column(db.Integer, default=0)
+    avg_likes = db.Column(db.Float, default=0)
+    avg_comments = db.Column(db.Float, default=0)
+    avg_shares = db.Column(db.Float, default=0)
+    # average interactions per post per follower
+    engagement_rate = db.Column(db.Float, default=0)
+    posts_per_week = db.Column(db.Float, default=0)
+    first_posted_at = db.Column(db.DateTime, nullable=True)
+    last_posted_at = db.Column(db.DateTime, nullable=True)
+    # comma separated linkedin_post_ids, most engaging first
+    top_post_ids = db.Column(db.Text, nullable=True)
+    
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    page = db.relationship('Page', backref=db.backref('stats', uselist=False))
+    
+    def to_dict(self):
+        return {
+            'post_count': self.post_count,
+            'total_likes': self.total_likes,
+            'total_comments': self.total_comments,
+            'total_shares': self.total_shares,
+            'avg_likes': self.avg_likes,
+            'avg_comments': self.avg_comments,
+            'avg_shares': self.avg_shares,
+            'engagement_rate': self.engagement_rate,
+            'posts_per_week': self.posts_per_week,
+            'first_posted_at': self.first_posted_at.isoformat() if self.first_posted_at else None,
+            'last_posted_at': self.last_posted_at.isoformat() if self.last_posted_at else None,
+            'top_post_ids': self.top_post_ids.split(',') if self.top_post_ids else [],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class PageRanking(db.Model):
+    """
+    A page's position on one leaderboard. industry is the lowercased
+    industry name, or '' for the board across all pages.
+    """
+    __tablename__ = 'page_rankings'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    metric = db.Column(db.String(32), nullable=False)
+    industry = db.Column(db.String(255), nullable=False, default='')
+    page_id = db.Column(db.Integer, db.ForeignKey('pages.id'), nullable=False)
+    score = db.Column(db.Float, nullable=False, default=0)
+    rank = db.Column(db.Integer, nullable=False)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    page = db.relationship('Page')
+    
+    __table_args__ = (
+        # top-N reads walk this index in rank order
+        db.Index('ix_page_rankings_board_rank', 'metric', 'industry', 'rank', unique=True),
+        # single page rank lookups
+        db.Index('ix_page_rankings_board_page', 'metric', 'industry', 'page_id', unique=True),
+    )
+
+
+class SearchTerm(db.Model):
+    """
+    Inverted index entry: a lowercased term found in a page (doc_type
+    'page') or one of its posts (doc_type 'post'), with a relevance
+    weight for that document.
+    """
+    __tablename__ = 'search_terms'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    term = db.Column(db.String(64), nullable=False)
+    doc_type = db.Column(db.String(10), nullable=False)
+    doc_id = db.Column(db.Integer, nullable=False)
+    page_id = db.Column(db.Integer, db.ForeignKey('pages.id'), nullable=False, index=True)
+    weight = db.Column(db.Float, nullable=False, default=1)
+    
+    __table_args__ = (
+        # exact and prefix lookups are range scans on term
+        db.Index('ix_search_terms_term', 'term', 'doc_type'),
+    )
@@ -0,0 +1,131 @@
+import orjson
+from flask import Blueprint, Response, current_app, request, stream_with_context
+
+from app.models import db, Page, Post, User, page_followers
+from app.serializers import page_serializer, post_serializer, user_serializer
+from app.services.taxonomy import industry_ids_matching
+from app.helpers import parse_follower_range, format_error, validate_page_id
+
+export_bp = Blueprint('export', __name__, url_prefix='/api/export')
+
+
+def stream_ndjson(stmt, serializer, fields, page_key=False):
+    """
+    Run stmt on a server-side cursor and stream one JSON line per row,
+    a batch of EXPORT_BATCH_SIZE rows at a time. With page_key, the row's
+    last column is the owning page's page_id and is added to each line.
+    """
+    batch_size = current_app.config.get('EXPORT_BATCH_SIZE', 1000)
+    stmt = stmt.execution_options(yield_per=batch_size, stream_results=True)
+    
+    def generate():
+        result = db.session.execute(stmt)
+        try:
+            for rows in result.partitions():
+                items = serializer.serialize(rows, fields)
+                if page_key:
+                    for row, item in zip(rows, items):
+                        item['page_id'] = row[-1]
+                yield b''.join(
+                    orjson.dumps(item, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE)
+                    for item in items
+                )
+        finally:
+            result.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def parse_export_request(serializer):
+    """fields and the optional page_id filter shared by the child exports"""
+    fields = serializer.parse_fields(request.args.get('fields'))
+    page_id = request.args.get('page_id')
+    if page_id is not None and not validate_page_id(page_id):
+        raise ValueError("Invalid page ID format")
+    return fields, page_id
+
+
+@export_bp.route('/pages.ndjson', methods=['GET'])
+def export_pages():
+    """
+    Every page as NDJSON, in id order. Takes the same follower_range,
+    name, industry and fields filters as /api/pages/.
+    """
+    try:
+        fields = page_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    min_followers, max_followers = parse_follower_range(request.args.get('follower_range'))
+    name_search = request.args.get('name')
+    industry = request.args.get('industry')
+    
+    stmt = db.select(*page_serializer.columns(fields)).order_by(Page.id)
+    
+    if min_followers is not None:
+        stmt = stmt.where(Page.follower_count >= min_followers)
+    if max_followers is not None:
+        stmt = stmt.where(Page.follower_count <= max_followers)
+    if name_search:
+        stmt = stmt.where(Page.name.ilike(f"%{name_search.strip()}%"))
+    if industry:
+        stmt = stmt.where(Page.industry_id.in_(industry_ids_matching(industry.strip().lower())))
+    
+    return stream_ndjson(stmt, page_serializer, fields)
+
+
+@export_bp.route('/posts.ndjson', methods=['GET'])
+def export_posts():
+    """Live posts as NDJSON, each with its page's page_id. page_id= limits it to one page."""
+    try:
+        fields, page_id = parse_export_request(post_serializer)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    stmt = db.select(*post_serializer.columns(fields), Page.page_id.label('page_key')) \
+        .join(Page, Post.page_id == Page.id) \
+        .where(Post.retired_at.is_(None)) \
+        .order_by(Post.id)
+    if page_id:
+        stmt = stmt.where(Page.page_id == page_id)
+    
+    return stream_ndjson(stmt, post_serializer, fields, page_key=True)
+
+
+@export_bp.route('/employees.ndjson', methods=['GET'])
+def export_employees():
+    """Employees as NDJSON, each with its page's page_id. page_id= limits it to one page."""
+    try:
+        fields, page_id = parse_export_request(user_serializer)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    stmt = db.select(*user_serializer.columns(fields), Page.page_id.label('page_key')) \
+        .join(Page, User.company_id == Page.id) \
+        .order_by(User.id)
+    if page_id:
+        stmt = stmt.where(Page.page_id == page_id)
+    
+    return stream_ndjson(stmt, user_serializer, fields, page_key=True)
+
+
+@export_bp.route('/followers.ndjson', methods=['GET'])
+def export_followers():
+    """
+    One NDJSON line per (page, follower) pair, with the page's page_id.
+    page_id= limits it to one page.
+    """
+    try:
+        fields, page_id = parse_export_request(user_serializer)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    stmt = db.select(*user_serializer.columns(fields), Page.page_id.label('page_key')) \
+        .select_from(page_followers) \
+        .join(User, page_followers.c.user_id == User.id) \
+        .join(Page, page_followers.c.page_id == Page.id) \
+        .order_by(page_followers.c.page_id, User.id)
+    if page_id:
+        stmt = stmt.where(Page.page_id == page_id)
+    
+    return stream_ndjson(stmt, user_serializer, fields, page_key=True)
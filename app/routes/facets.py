@@ -0,0 +1,26 @@
+from flask import Blueprint, current_app, request
+
+from app.services.cache_service import get_cached_facets, set_cached_facets
+from app.services.taxonomy import facet_counts
+from app.helpers import format_response, format_error
+
+facets_bp = Blueprint('facets', __name__, url_prefix='/api/facets')
+
+
+@facets_bp.route('/', methods=['GET'], strict_slashes=False)
+def get_facets():
+    """Page counts per industry and per speciality, for filter UIs."""
+    limit = request.args.get('limit', 50, type=int)
+    
+    if limit is None or limit < 1:
+        return format_error("limit must be a positive integer", 400)
+    limit = min(limit, current_app.config.get('FACETS_MAX_LIMIT', 200))
+    
+    cached = get_cached_facets(limit)
+    if cached:
+        return format_response(cached, "Retrieved from cache")
+    
+    data = facet_counts(limit)
+    set_cached_facets(limit, data, timeout=current_app.config.get('FACETS_CACHE_TIMEOUT', 3600))
+    
+    return format_response(data)
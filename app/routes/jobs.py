@@ -0,0 +1,17 @@
+from flask import Blueprint
+
+from app.services.job_queue import job_queue
+from app.helpers import format_response, format_error
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status and progress of a scrape job."""
+    job = job_queue.get(job_id)
+
+    if not job:
+        return format_error("Job not found", 404)
+
+    return format_response(job.to_dict())
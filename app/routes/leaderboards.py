@@ -0,0 +1,73 @@
+from flask import Blueprint, current_app, request
+
+from app.models import Page
+from app.services.rankings import METRICS, ensure_rankings, top_pages, page_rank, industry_key
+from app.helpers import format_response, format_error
+
+leaderboards_bp = Blueprint('leaderboards', __name__, url_prefix='/api/leaderboards')
+
+
+def _ensure_fresh():
+    return ensure_rankings(current_app.config.get('LEADERBOARD_MAX_AGE', 900))
+
+
+@leaderboards_bp.route('/', methods=['GET'], strict_slashes=False)
+def get_leaderboard():
+    """Top pages by a metric, optionally within one industry."""
+    metric = request.args.get('metric', 'follower_count')
+    industry = request.args.get('industry', '')
+    limit = request.args.get('limit', 10, type=int)
+    
+    if metric not in METRICS:
+        return format_error(f"metric must be one of: {', '.join(METRICS)}", 400)
+    
+    if limit is None or limit < 1:
+        return format_error("limit must be a positive integer", 400)
+    limit = min(limit, current_app.config.get('LEADERBOARD_MAX_LIMIT', 100))
+    
+    built_at = _ensure_fresh()
+    
+    entries = [
+        {
+            'rank': ranking.rank,
+            'score': ranking.score,
+            'page_id': page.page_id,
+            'name': page.name,
+            'industry': page.industry
+        }
+        for ranking, page in top_pages(metric, industry, limit)
+    ]
+    
+    return format_response({
+        'metric': metric,
+        'industry': industry_key(industry) or None,
+        'built_at': built_at.isoformat() if built_at else None,
+        'pages': entries
+    })
+
+
+@leaderboards_bp.route('/pages/<page_id>', methods=['GET'])
+def get_page_ranks(page_id):
+    """A page's rank on every board, overall and within its industry."""
+    page = Page.query.filter_by(page_id=page_id).first()
+    
+    if not page:
+        return format_error("Page not found", 404)
+    
+    _ensure_fresh()
+    
+    ranks = {}
+    for metric in METRICS:
+        overall = page_rank(page, metric)
+        in_industry = page_rank(page, metric, page.industry) if industry_key(page.industry) else None
+        ranks[metric] = {
+            'score': overall.score if overall else None,
+            'rank': overall.rank if overall else None,
+            'industry_rank': in_industry.rank if in_industry else None
+        }
+    
+    return format_response({
+        'page_id': page.page_id,
+        'industry': page.industry,
+        'ranks': ranks
+    })
@@ -1,52 +1,120 @@
-from flask import Blueprint, request
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Blueprint, Response, current_app, request, stream_with_context, url_for
 
-from app.models import db, Page, Post, User, Comment
+from app.models import db, Page, Post, User, Comment, page_followers
 from app.services.scraper import LinkedInScraper
-from app.services.cache_service import get_cached_page, set_cached_page
-from app.helpers import paginate_query, parse_follower_range, format_response, format_error, validate_page_id
+from app.services.driver_pool import DriverPoolTimeout
+from app.services.cache_service import (
+    get_cached_page_entry, set_cached_page, get_cached_page_slice_entry, set_cached_page_slice, warm_page_cache,
+    get_cached_listing, set_cached_listing, get_cached_total, set_cached_total,
+    get_cached_analytics, set_cached_analytics
+)
+from app.services.job_queue import job_queue, refresh_queue
+from app.services.persistence import persist_scraped_data
+from app.services.single_flight import scrape_flight
+from app.services.page_loader import load_page_parts
+from app.serializers import page_serializer, post_serializer, user_serializer, json_response
+from app.services.page_stats import get_page_stats, daily_engagement, weekly_rollup
+from app.services.taxonomy import industry_ids_matching
+from app.helpers import (
+    paginate_query, keyset_paginate, parse_follower_range, format_response, format_error, validate_page_id
+)
 
 pages_bp = Blueprint('pages', __name__, url_prefix='/api/pages')
 
 scraper = LinkedInScraper()
 
 
+def paginate_listing(query, page_num, per_page, id_column, sort_column=None, max_per_page=50, total=None):
+    """
+    Page/per_page pagination, or keyset pagination when the request has a
+    cursor parameter. Sorted listings go newest/largest first; unsorted
+    ones go by id.
+    """
+    cursor = request.args.get('cursor')
+    
+    if cursor is not None:
+        return keyset_paginate(query, id_column, sort_column, cursor, per_page, max_per_page,
+                               descending=sort_column is not None)
+    
+    if sort_column is not None:
+        query = query.order_by(sort_column.desc())
+    
+    return paginate_query(query, page_num, per_page, max_per_page, total=total)
+
+
 @pages_bp.route('/', methods=['GET'])
 def get_all_pages():
     """
     Get all pages with filtering and pagination.
+    fields=a,b limits the columns selected and returned.
     """
-    page_num = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    page_num = max(1, request.args.get('page', 1, type=int))
+    per_page = min(max(1, request.args.get('per_page', 10, type=int)), 50)
     follower_range = request.args.get('follower_range', None)
     name_search = request.args.get('name', None)
     industry = request.args.get('industry', None)
     
-    query = Page.query
+    try:
+        fields = page_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    min_followers, max_followers = parse_follower_range(follower_range)
+    
+    # ILIKE ignores case, so equivalent searches share a cache entry
+    filters = {
+        'min_followers': min_followers,
+        'max_followers': max_followers,
+        'name': name_search.strip().lower() if name_search else None,
+        'industry': industry.strip().lower() if industry else None
+    }
+    listing_key = dict(filters, fields=fields)
+    use_cache = 'cursor' not in request.args
     
-    if follower_range:
-        min_followers, max_followers = parse_follower_range(follower_range)
-        if min_followers is not None:
-            query = query.filter(Page.follower_count >= min_followers)
-        if max_followers is not None:
-            query = query.filter(Page.follower_count <= max_followers)
+    if use_cache:
+        cached = get_cached_listing(listing_key, page_num, per_page)
+        if cached:
+            return json_response(cached)
     
-    if name_search:
-        query = query.filter(Page.name.ilike(f'%{name_search}%'))
+    # row tuples of just the requested columns, plus what pagination sorts on
+    query = Page.query.with_entities(*page_serializer.columns(fields, extra=[Page.id, Page.follower_count]))
     
-    if industry:
-        query = query.filter(Page.industry.ilike(f'%{industry}%'))
+    if min_followers is not None:
+        query = query.filter(Page.follower_count >= min_followers)
+    if max_followers is not None:
+        query = query.filter(Page.follower_count <= max_followers)
     
-    query = query.order_by(Page.follower_count.desc())
+    if filters['name']:
+        query = query.filter(Page.name.ilike(f"%{filters['name']}%"))
     
-    result = paginate_query(query, page_num, per_page)
+    if filters['industry']:
+        # resolve the industry against the lookup table, then filter on the indexed id
+        query = query.filter(Page.industry_id.in_(industry_ids_matching(filters['industry'])))
     
-    pages_data = [p.to_dict() for p in result['items']]
+    total = get_cached_total(filters) if use_cache else None
     
-    return format_response({
-        'pages': pages_data,
+    try:
+        result = paginate_listing(query, page_num, per_page, Page.id, Page.follower_count, total=total)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    data = {
+        'pages': page_serializer.serialize(result['items'], fields),
         'pagination': result['pagination']
-    })
+    }
+    
+    if use_cache:
+        config = current_app.config
+        if total is None:
+            set_cached_total(filters, result['pagination']['total_items'],
+                             timeout=config.get('LISTING_TOTAL_TIMEOUT', 3600))
+        set_cached_listing(listing_key, page_num, per_page, data,
+                           timeout=config.get('LISTING_CACHE_TIMEOUT', 60))
+    
+    return json_response(data)
 
 
 @pages_bp.route('/<page_id>', methods=['GET'])
@@ -62,39 +130,158 @@ def get_page_by_id(page_id):
     include_employees = request.args.get('include_employees', 'false').lower() == 'true'
     force_refresh = request.args.get('force_refresh', 'false').lower() == 'true'
     
-    if not force_refresh:
-        cached = get_cached_page(page_id)
-        if cached:
-            return format_response(cached, "Retrieved from cache")
-    
-    page = Page.query.filter_by(page_id=page_id).first()
+    try:
+        fields = page_serializer.parse_fields(request.args.get('fields')) if request.args.get('fields') else None
+    except ValueError as e:
+        return format_error(str(e), 400)
     
-    if page and not force_refresh:
-        data = page.to_dict(include_posts=include_posts, include_employees=include_employees)
-        set_cached_page(page_id, data)
-        return format_response(data, "Retrieved from database")
+    if not force_refresh:
+        data, meta = load_page_variant(page_id, include_posts, include_employees, fields=fields)
+        if data:
+            message = "Retrieved from cache" if meta['source'] == 'cache' else "Retrieved from database"
+            return format_response(data, message, meta=meta)
     
     try:
-        scraped_data = scraper.scrape_page(page_id)
+        # concurrent misses for the same page share one scrape
+        changes = scrape_shared(page_id)
         
-        if not scraped_data:
-            return format_error(f"Could not fetch page: {page_id}", 404)
+        # saving writes the fresh page through to the cache
+        data, meta = load_page_variant(page_id, include_posts, include_employees, fields=fields)
         
-        page = save_scraped_data(scraped_data)
+        if not data:
+            return format_error(f"Could not fetch page: {page_id}", 404)
         
-        data = page.to_dict(include_posts=include_posts, include_employees=include_employees)
-        set_cached_page(page_id, data)
+        if changes and changes['unchanged']:
+            return format_response(data, "Page unchanged since last scrape", meta=meta)
         
-        return format_response(data, "Scraped and saved successfully")
+        return format_response(data, "Scraped and saved successfully", meta=meta)
         
+    except DriverPoolTimeout as e:
+        return format_error(f"Scraper busy, try again later: {str(e)}", 503)
     except Exception as e:
         return format_error(f"Error scraping page: {str(e)}", 500)
 
 
+def load_page_variant(page_id, include_posts=False, include_employees=False, use_cache=True, fields=None):
+    """
+    Build the page response for the requested variant. The base page
+    object and the posts/employees slices are cached under their own
+    keys with their own TTLs, so every variant shares them and a light
+    request never fills the cache with a heavy response or the reverse.
+    Parts past their TTL are served stale while a background re-read
+    replaces them, and a page last scraped longer ago than
+    PAGE_FRESHNESS_WINDOW is re-scraped in the background.
+    Whatever is not cached is loaded in at most two queries. With
+    fields, only those page fields are returned; a base that is not
+    cached is then read with just those columns and not cached.
+    Returns (data, meta), or (None, None) if the page is unknown.
+    """
+    config = current_app.config
+    source = 'cache'
+    stale_ages = []
+    
+    parts = {'base': None, 'posts': None, 'employees': None}
+    wanted = {'base': True, 'posts': include_posts, 'employees': include_employees}
+    
+    if use_cache:
+        parts['base'], stale_age = get_cached_page_entry(page_id)
+        if parts['base'] is not None:
+            stale_ages.append(stale_age)
+        for name in ('posts', 'employees'):
+            if wanted[name]:
+                parts[name], stale_age = get_cached_page_slice_entry(page_id, name)
+                if parts[name] is not None:
+                    stale_ages.append(stale_age)
+    
+    missing = [name for name in parts if wanted[name] and parts[name] is None]
+    
+    if missing:
+        source = 'database'
+        page_fields = None
+        if fields is not None:
+            # last_checked_at feeds the freshness check
+            page_fields = set(fields) | set(['last_checked_at'])
+        
+        base, posts, employees = load_page_parts(
+            page_id,
+            include_base='base' in missing,
+            include_posts='posts' in missing,
+            include_employees='employees' in missing,
+            page_pk=parts['base']['id'] if parts['base'] is not None else None,
+            page_fields=page_fields
+        )
+        
+        if 'base' in missing:
+            if base is None:
+                return None, None
+            parts['base'] = base
+            if page_fields is None:
+                set_cached_page(page_id, base, timeout=config.get('PAGE_CACHE_TIMEOUT', 300))
+        if 'posts' in missing:
+            parts['posts'] = posts
+            set_cached_page_slice(page_id, 'posts', posts, timeout=config.get('PAGE_POSTS_CACHE_TIMEOUT', 300))
+        if 'employees' in missing:
+            parts['employees'] = employees
+            set_cached_page_slice(page_id, 'employees', employees,
+                                  timeout=config.get('PAGE_EMPLOYEES_CACHE_TIMEOUT', 300))
+    
+    base = parts['base']
+    if fields is None:
+        data = dict(base)
+    else:
+        data = dict((name, base[name]) for name in fields)
+    for name in ('posts', 'employees'):
+        if wanted[name]:
+            data[name] = parts[name]
+    
+    meta = {
+        'source': source,
+        'stale_age': round(max(stale_ages or [0]), 1),
+        'refresh_age': refresh_age(base),
+        'revalidating': []
+    }
+    
+    if meta['stale_age']:
+        refresh_queue.submit_unique(page_id, run_cache_refresh)
+        meta['revalidating'].append('cache')
+    
+    window = config.get('PAGE_FRESHNESS_WINDOW', 0)
+    if window and meta['refresh_age'] is not None and meta['refresh_age'] > window:
+        job_queue.submit_unique(page_id, run_scrape_job)
+        meta['revalidating'].append('scrape')
+    
+    return data, meta
+
+
+def refresh_age(page_data):
+    """Seconds since a serialized page was last scraped, or None if it never was"""
+    last_checked_at = page_data.get('last_checked_at')
+    if not last_checked_at:
+        return None
+    age = datetime.utcnow() - datetime.fromisoformat(last_checked_at)
+    return round(age.total_seconds(), 1)
+
+
+def run_cache_refresh(job):
+    """Worker body for a stale cache entry: re-read the page and cache it."""
+    page = Page.query.filter_by(page_id=job.page_id).first()
+    
+    if not page:
+        return None
+    
+    warm_page_cache(page)
+    return {'page_id': page.page_id}
+
+
+def find_page_ref(page_id):
+    """Just the id and name of a page, for endpoints that list its children"""
+    return Page.query.with_entities(Page.id, Page.name).filter_by(page_id=page_id).first()
+
+
 @pages_bp.route('/<page_id>/posts', methods=['GET'])
 def get_page_posts(page_id):
-    """Get posts for a specific page."""
-    page = Page.query.filter_by(page_id=page_id).first()
+    """Get posts for a specific page. fields=a,b limits the columns returned."""
+    page = find_page_ref(page_id)
     
     if not page:
         return format_error("Page not found", 404)
@@ -103,14 +290,28 @@ def get_page_posts(page_id):
     per_page = request.args.get('per_page', 10, type=int)
     include_comments = request.args.get('include_comments', 'false').lower() == 'true'
     
-    per_page = min(per_page, 25)
+    try:
+        fields = post_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    query = Post.query.filter_by(page_id=page.id, retired_at=None) \
+        .with_entities(*post_serializer.columns(fields, extra=[Post.id, Post.posted_at]))
     
-    query = Post.query.filter_by(page_id=page.id).order_by(Post.posted_at.desc())
-    result = paginate_query(query, page_num, per_page)
+    try:
+        result = paginate_listing(query, page_num, per_page, Post.id, Post.posted_at, max_per_page=25)
+    except ValueError as e:
+        return format_error(str(e), 400)
     
-    posts_data = [p.to_dict(include_comments=include_comments) for p in result['items']]
+    posts_data = post_serializer.serialize(result['items'], fields)
     
-    return format_response({
+    if include_comments:
+        # one query for the comments of every post on this page of results
+        comments = Comment.first_for_posts([row.id for row in result['items']])
+        for row, post in zip(result['items'], posts_data):
+            post['comments'] = comments[row.id]
+    
+    return json_response({
         'page_name': page.name,
         'posts': posts_data,
         'pagination': result['pagination']
@@ -119,8 +320,8 @@ def get_page_posts(page_id):
 
 @pages_bp.route('/<page_id>/employees', methods=['GET'])
 def get_page_employees(page_id):
-    """Get employees of a specific page."""
-    page = Page.query.filter_by(page_id=page_id).first()
+    """Get employees of a specific page. fields=a,b limits the columns returned."""
+    page = find_page_ref(page_id)
     
     if not page:
         return format_error("Page not found", 404)
@@ -128,22 +329,29 @@ def get_page_employees(page_id):
     page_num = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    query = User.query.filter_by(company_id=page.id)
-    result = paginate_query(query, page_num, per_page)
+    try:
+        fields = user_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return format_error(str(e), 400)
     
-    employees_data = [e.to_dict() for e in result['items']]
+    query = User.query.filter_by(company_id=page.id).with_entities(*user_serializer.columns(fields, extra=[User.id]))
     
-    return format_response({
+    try:
+        result = paginate_listing(query, page_num, per_page, User.id)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    return json_response({
         'page_name': page.name,
-        'employees': employees_data,
+        'employees': user_serializer.serialize(result['items'], fields),
         'pagination': result['pagination']
     })
 
 
 @pages_bp.route('/<page_id>/followers', methods=['GET'])
 def get_page_followers(page_id):
-    """Get followers of a specific page."""
-    page = Page.query.filter_by(page_id=page_id).first()
+    """Get followers of a specific page. fields=a,b limits the columns returned."""
+    page = find_page_ref(page_id)
     
     if not page:
         return format_error("Page not found", 404)
@@ -151,14 +359,23 @@ def get_page_followers(page_id):
     page_num = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 10, type=int)
     
-    query = page.followers
-    result = paginate_query(query, page_num, per_page)
+    try:
+        fields = user_serializer.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return format_error(str(e), 400)
     
-    followers_data = [f.to_dict() for f in result['items']]
+    query = User.query.join(page_followers, page_followers.c.user_id == User.id) \
+        .filter(page_followers.c.page_id == page.id) \
+        .with_entities(*user_serializer.columns(fields, extra=[User.id]))
     
-    return format_response({
+    try:
+        result = paginate_listing(query, page_num, per_page, User.id)
+    except ValueError as e:
+        return format_error(str(e), 400)
+    
+    return json_response({
         'page_name': page.name,
-        'followers': followers_data,
+        'followers': user_serializer.serialize(result['items'], fields),
         'pagination': result['pagination']
     })
 
@@ -179,160 +396,193 @@ def get_page_summary(page_id):
     })
 
 
+@pages_bp.route('/<page_id>/stats', methods=['GET'])
+def get_page_stats_route(page_id):
+    """Get precomputed post engagement statistics for a page."""
+    page = Page.query.filter_by(page_id=page_id).first()
+    
+    if not page:
+        return format_error("Page not found", 404)
+    
+    return format_response({
+        'page_name': page.name,
+        'stats': get_page_stats(page).to_dict()
+    })
+
+
+@pages_bp.route('/<page_id>/analytics', methods=['GET'])
+def get_page_analytics(page_id):
+    """
+    Daily and weekly engagement buckets over the last `days` days of
+    posts. Aggregated in SQL and cached per page and window until the
+    page's posts change.
+    """
+    days = request.args.get('days', 90, type=int)
+    max_days = current_app.config.get('ANALYTICS_MAX_DAYS', 365)
+    
+    if days is None or not 1 <= days <= max_days:
+        return format_error(f"days must be between 1 and {max_days}", 400)
+    
+    page = Page.query.filter_by(page_id=page_id).first()
+    
+    if not page:
+        return format_error("Page not found", 404)
+    
+    end = datetime.utcnow().date()
+    start = end - timedelta(days=days - 1)
+    
+    cached = get_cached_analytics(page_id, days, start.isoformat())
+    if cached:
+        return format_response(cached, "Retrieved from cache")
+    
+    daily = daily_engagement(page, datetime.combine(start, datetime.min.time()))
+    
+    data = {
+        'page_name': page.name,
+        'window': {'days': days, 'start': start.isoformat(), 'end': end.isoformat()},
+        'daily': daily,
+        'weekly': weekly_rollup(daily)
+    }
+    
+    set_cached_analytics(page_id, days, start.isoformat(), data,
+                         timeout=current_app.config.get('ANALYTICS_CACHE_TIMEOUT', 600))
+    
+    return format_response(data)
+
+
 @pages_bp.route('/<page_id>/scrape', methods=['POST'])
 def scrape_page(page_id):
-    """Force scrape/refresh a page."""
+    """Queue a scrape/refresh of a page and return the job straight away."""
     if not validate_page_id(page_id):
         return format_error("Invalid page ID format", 400)
+
+    # a scrape already queued or running for this page is shared
+    job, created = job_queue.submit_unique(page_id, run_scrape_job)
+    message = "Scrape job queued" if created else "Scrape already in progress"
+
+    data = job.to_dict()
+    data['status_url'] = url_for('jobs.get_job_status', job_id=job.id)
+
+    return format_response(data, message, 202)
+
+
+@pages_bp.route('/batch-scrape', methods=['POST'])
+def batch_scrape():
+    """
+    Scrape a list of pages with bounded concurrency.
+    Streams one NDJSON line per page as each one finishes.
+    """
+    payload = request.get_json(silent=True) or {}
+    page_ids = payload.get('page_ids')
+    
+    if not isinstance(page_ids, list) or not page_ids:
+        return format_error("page_ids must be a non-empty list", 400)
+    
+    invalid = [p for p in page_ids if not isinstance(p, str) or not validate_page_id(p)]
+    if invalid:
+        return format_error(f"Invalid page IDs: {', '.join(map(str, invalid))}", 400)
+    
+    # drop duplicates but keep the caller's order
+    page_ids = list(dict.fromkeys(page_ids))
+    
+    max_pages = current_app.config.get('BATCH_SCRAPE_MAX_PAGES', 500)
+    if len(page_ids) > max_pages:
+        return format_error(f"At most {max_pages} pages per batch", 400)
+    
+    concurrency = payload.get('concurrency', current_app.config.get('BATCH_SCRAPE_CONCURRENCY', 4))
+    # bool is an int subclass; true/false are not a worker count
+    if isinstance(concurrency, bool) or not isinstance(concurrency, int) or concurrency < 1:
+        return format_error("concurrency must be a positive integer", 400)
+    concurrency = min(concurrency, current_app.config.get('BATCH_SCRAPE_MAX_CONCURRENCY', 8))
+    
+    app = current_app._get_current_object()
+    
+    def generate():
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='batch-scrape')
+        try:
+            futures = [executor.submit(batch_scrape_one, app, page_id) for page_id in page_ids]
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + '\n'
+        finally:
+            # stop queued pages if the client goes away
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def batch_scrape_one(app, page_id):
+    """Scrape and save one page of a batch; returns its NDJSON result."""
+    with app.app_context():
+        try:
+            scrape_shared(page_id)
+            page = Page.query.filter_by(page_id=page_id).first()
+            
+            if not page:
+                return {'page_id': page_id, 'status': 'error', 'error': 'Could not scrape page'}
+            
+            return {'page_id': page_id, 'status': 'ok', 'name': page.name}
+            
+        except Exception as e:
+            return {'page_id': page_id, 'status': 'error', 'error': str(e)}
+
+
+def run_scrape_job(job):
+    """Worker body for a queued scrape: fetch the page and save it."""
+    job.update('scraping')
+
+    changes = scrape_shared(job.page_id, job)
+
+    page = Page.query.filter_by(page_id=job.page_id).first()
+
+    if not page:
+        raise RuntimeError(f"Could not scrape page: {job.page_id}")
+
+    return {
+        'page_id': page.page_id,
+        'name': page.name,
+        'changes': changes
+    }
+
+
+def scrape_shared(page_id, job=None):
+    """
+    scrape_and_save once for all concurrent callers of page_id.
+    Callers that waited on another scrape may still hold a transaction
+    begun before it committed; under REPEATABLE READ its snapshot would
+    hide the saved page, so it is ended before they re-read.
+    """
+    changes = scrape_flight.do(page_id, lambda: scrape_and_save(page_id, job))
+    db.session.rollback()
+    return changes
+
+
+def scrape_and_save(page_id, job=None):
+    """Scrape a page and store it. Returns the change summary, or None if nothing was scraped."""
+    parallel = current_app.config.get('SCRAPER_PARALLEL_SECTIONS', False)
+    scraped_data = scraper.scrape_page(page_id, parallel=parallel)
     
-    try:
-        scraped_data = scraper.scrape_page(page_id)
-        
-        if not scraped_data:
-            return format_error("Could not scrape page", 500)
-        
-        page = save_scraped_data(scraped_data)
-        
-        return format_response(
-            page.to_dict(include_posts=True, include_employees=True),
-            "Page scraped and saved successfully"
-        )
-        
-    except Exception as e:
-        return format_error(f"Scraping failed: {str(e)}", 500)
-
-
-def save_scraped_data(data):
-    """Save scraped data to database."""
-    
-    # Check if page already exists
-    page = Page.query.filter_by(page_id=data['page_id']).first()
-    
-    if page:
-        # Update existing page
-        page.name = data.get('name', page.name)
-        page.linkedin_id = data.get('linkedin_id', page.linkedin_id)
-        page.url = data.get('url', page.url)
-        page.profile_picture = data.get('profile_picture', page.profile_picture)
-        page.description = data.get('description', page.description)
-        page.website = data.get('website', page.website)
-        page.industry = data.get('industry', page.industry)
-        page.follower_count = data.get('follower_count', page.follower_count)
-        page.employee_count = data.get('employee_count', page.employee_count)
-        page.specialities = data.get('specialities', page.specialities)
-        page.headquarters = data.get('headquarters', page.headquarters)
-        page.founded_year = data.get('founded_year', page.founded_year)
-        page.company_type = data.get('company_type', page.company_type)
-        page.updated_at = datetime.utcnow()
-    else:
-        # Create new page
-        page = Page(
-            page_id=data['page_id'],
-            linkedin_id=data.get('linkedin_id'),
-            name=data.get('name', data['page_id']),
-            url=data.get('url'),
-            profile_picture=data.get('profile_picture'),
-            description=data.get('description'),
-            website=data.get('website'),
-            industry=data.get('industry'),
-            follower_count=data.get('follower_count', 0),
-            employee_count=data.get('employee_count', 0),
-            specialities=data.get('specialities'),
-            headquarters=data.get('headquarters'),
-            founded_year=data.get('founded_year'),
-            company_type=data.get('company_type')
-        )
-        db.session.add(page)
+    if not scraped_data:
+        return None
     
-    db.session.flush()
+    if job:
+        job.update('saving')
     
-    # Handle posts - delete old ones first (with their comments)
-    if 'posts' in data and data['posts']:
-        
-        # Get all existing posts for this page
-        existing_posts = Post.query.filter_by(page_id=page.id).all()
-        
-        # Delete comments for each post first
-        for old_post in existing_posts:
-            Comment.query.filter_by(post_id=old_post.id).delete()
-        
-        # Now delete the posts
-        Post.query.filter_by(page_id=page.id).delete()
-        
-        # Add new posts
-        for post_data in data['posts']:
-            post = Post(
-                page_id=page.id,
-                linkedin_post_id=post_data.get('linkedin_post_id'),
-                content=post_data.get('content'),
-                post_url=post_data.get('post_url'),
-                media_url=post_data.get('media_url'),
-                media_type=post_data.get('media_type'),
-                like_count=post_data.get('like_count', 0),
-                comment_count=post_data.get('comment_count', 0),
-                share_count=post_data.get('share_count', 0),
-                posted_at=post_data.get('posted_at')
-            )
-            db.session.add(post)
-            db.session.flush()
-            
-            # Add comments for this post
-            if 'comments' in post_data and post_data['comments']:
-                for comment_data in post_data['comments']:
-                    comment = Comment(
-                        post_id=post.id,
-                        author_name=comment_data.get('author_name'),
-                        author_profile_url=comment_data.get('author_profile_url'),
-                        content=comment_data.get('content'),
-                        like_count=comment_data.get('like_count', 0),
-                        commented_at=comment_data.get('commented_at')
-                    )
-                    db.session.add(comment)
-    
-    # Handle employees
-    if 'employees' in data and data['employees']:
-        
-        # Remove company association from old employees
-        User.query.filter_by(company_id=page.id).update({'company_id': None})
-        
-        for emp_data in data['employees']:
-            # Check if user exists by name
-            user = User.query.filter_by(full_name=emp_data.get('full_name')).first()
-            
-            if user:
-                user.company_id = page.id
-                user.job_title = emp_data.get('job_title') or emp_data.get('headline')
-                user.headline = emp_data.get('headline')
-                user.profile_url = emp_data.get('profile_url')
-                user.profile_picture = emp_data.get('profile_picture')
-                user.location = emp_data.get('location')
-            else:
-                user = User(
-                    full_name=emp_data.get('full_name'),
-                    username=emp_data.get('username'),
-                    headline=emp_data.get('headline'),
-                    job_title=emp_data.get('job_title') or emp_data.get('headline'),
-                    profile_url=emp_data.get('profile_url'),
-                    profile_picture=emp_data.get('profile_picture'),
-                    location=emp_data.get('location'),
-                    company_id=page.id
-                )
-                db.session.add(user)
-    
-    db.session.commit()
-    return page
+    page, changes = persist_scraped_data(scraped_data)
+    return changes
 
 
 def generate_page_summary(page):
     """Generate summary for a page."""
     from app.config import Config
     
+    stats = get_page_stats(page)
+    
     basic_summary = {
         'company_overview': f"{page.name} is a {page.company_type or 'company'} in the {page.industry or 'business'} industry.",
         'size': f"The company has approximately {page.employee_count} employees and {page.follower_count} followers on LinkedIn.",
         'presence': f"They are headquartered in {page.headquarters or 'an undisclosed location'}.",
         'specialties': f"Their areas of expertise include: {page.specialities or 'various fields'}.",
-        'engagement': "The company maintains an active presence on LinkedIn with regular posts and updates."
+        'engagement': describe_engagement(stats)
     }
     
     if not Config.OPENAI_API_KEY:
@@ -352,6 +602,7 @@ def generate_page_summary(page):
         Employees: {page.employee_count}
         Specialties: {page.specialities}
         Headquarters: {page.headquarters}
+        Engagement: {basic_summary['engagement']}
         
         Provide a concise summary covering: company overview, market position, and key insights."""
         
@@ -377,4 +628,17 @@ def generate_page_summary(page):
             'ai_generated': False,
             'error': str(e),
             'summary': basic_summary
-        }
\ No newline at end of file
+        }
+
+
+def describe_engagement(stats):
+    """One-line engagement summary from a page's stats row."""
+    if not stats.post_count:
+        return "No posts have been recorded for this page yet."
+    
+    return (
+        f"Across {stats.post_count} recent posts they average {stats.avg_likes:.0f} likes, "
+        f"{stats.avg_comments:.0f} comments and {stats.avg_shares:.0f} shares "
+        f"({stats.engagement_rate:.2%} of followers per post), "
+        f"posting about {stats.posts_per_week:.1f} times a week."
+    )
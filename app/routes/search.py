@@ -0,0 +1,66 @@
+from flask import Blueprint, current_app, request
+
+from app.models import Page, Post
+from app.services.search import search
+from app.helpers import format_response, format_error
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+DOC_TYPES = ('page', 'post')
+
+
+@search_bp.route('/', methods=['GET'], strict_slashes=False)
+def search_documents():
+    """Search pages and posts by relevance; the last word may be a prefix."""
+    q = request.args.get('q', '').strip()
+    doc_type = request.args.get('type')
+    limit = request.args.get('limit', 20, type=int)
+    
+    if not q:
+        return format_error("q is required", 400)
+    
+    if doc_type and doc_type not in DOC_TYPES:
+        return format_error(f"type must be one of: {', '.join(DOC_TYPES)}", 400)
+    
+    if limit is None or limit < 1:
+        return format_error("limit must be a positive integer", 400)
+    limit = min(limit, current_app.config.get('SEARCH_MAX_LIMIT', 50))
+    
+    hits = search(q, doc_type, limit)
+    
+    page_ids = [doc_id for found_type, doc_id, score in hits if found_type == 'page']
+    post_ids = [doc_id for found_type, doc_id, score in hits if found_type == 'post']
+    
+    pages = dict((p.id, p) for p in Page.query.filter(Page.id.in_(page_ids))) if page_ids else {}
+    posts = {}
+    if post_ids:
+        rows = Post.query.join(Page).filter(Post.id.in_(post_ids)).with_entities(Post, Page.page_id)
+        posts = dict((post.id, (post, owner)) for post, owner in rows)
+    
+    results = []
+    for found_type, doc_id, score in hits:
+        if found_type == 'page' and doc_id in pages:
+            page = pages[doc_id]
+            results.append({
+                'type': 'page',
+                'score': score,
+                'page_id': page.page_id,
+                'name': page.name,
+                'industry': page.industry,
+                'follower_count': page.follower_count
+            })
+        elif found_type == 'post' and doc_id in posts:
+            post, owner = posts[doc_id]
+            results.append({
+                'type': 'post',
+                'score': score,
+                'page_id': owner,
+                'post_id': post.id,
+                'linkedin_post_id': post.linkedin_post_id,
+                'content': post.content
+            })
+    
+    return format_response({
+        'query': q,
+        'results': results
+    })
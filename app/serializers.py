@@ -0,0 +1,100 @@
+"""
+Column-level serialization for list endpoints.
+
+Instead of hydrating ORM objects and calling to_dict on each, list
+endpoints select just the columns a response needs as row tuples and
+encode them with orjson, which writes datetimes in the same ISO format
+as isoformat(). The output matches the models' to_dict.
+"""
+import orjson
+from flask import current_app
+
+from app.models import Page, Post, User
+
+
+def split_list(value):
+    return value.split(',') if value else []
+
+
+class RowSerializer:
+    """
+    Maps response field names to columns, with an optional transform for
+    fields whose JSON form differs from the column value.
+    """
+
+    def __init__(self, fields, transforms=None):
+        self.fields = fields
+        self.transforms = transforms or {}
+
+    def parse_fields(self, raw):
+        """
+        Field names from a `fields=a,b` query parameter, in the default
+        order; all fields when raw is empty. Raises ValueError on unknown
+        names, or when raw names no field at all (e.g. `fields=,`).
+        """
+        if not raw:
+            return list(self.fields)
+
+        requested = [name.strip() for name in raw.split(',') if name.strip()]
+        if not requested:
+            raise ValueError(f"fields must name at least one of: {', '.join(self.fields)}")
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(self.fields)}")
+
+        return [name for name in self.fields if name in requested]
+
+    def columns(self, names, extra=()):
+        """Columns to select for names, plus extra columns the query needs (e.g. for cursors)"""
+        columns = [self.fields[name].label(name) for name in names]
+        columns += [column for column in extra if column.key not in names]
+        return columns
+
+    def serialize(self, rows, names):
+        """Row tuples -> list of dicts of the named fields"""
+        transforms = [(name, self.transforms[name]) for name in names if name in self.transforms]
+        count = len(names)
+        result = []
+        for row in rows:
+            item = dict(zip(names, row[:count]))
+            for name, transform in transforms:
+                item[name] = transform(item[name])
+            result.append(item)
+        return result
+
+
+page_serializer = RowSerializer(
+    dict((name, getattr(Page, name)) for name in [
+        'id', 'page_id', 'linkedin_id', 'name', 'url', 'profile_picture', 'description', 'website',
+        'industry', 'follower_count', 'employee_count', 'specialities', 'headquarters', 'founded_year',
+        'company_type', 'created_at', 'updated_at', 'last_checked_at'
+    ]),
+    transforms={'specialities': split_list}
+)
+
+post_serializer = RowSerializer(
+    dict((name, getattr(Post, name)) for name in [
+        'id', 'linkedin_post_id', 'content', 'post_url', 'media_url', 'media_type',
+        'like_count', 'comment_count', 'share_count', 'posted_at', 'created_at'
+    ])
+)
+
+user_serializer = RowSerializer(
+    dict((name, getattr(User, name)) for name in [
+        'id', 'linkedin_id', 'username', 'full_name', 'profile_url', 'profile_picture',
+        'headline', 'location', 'job_title', 'created_at'
+    ])
+)
+
+
+def json_response(data, message="Success", status_code=200):
+    """format_response with the body encoded by orjson"""
+    body = orjson.dumps(
+        {
+            'status': 'success' if status_code < 400 else 'error',
+            'message': message,
+            'data': data
+        },
+        option=orjson.OPT_SORT_KEYS
+    )
+    return current_app.response_class(body, status=status_code, mimetype='application/json')
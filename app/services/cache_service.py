@@ -1,35 +1,381 @@
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from flask import current_app
 from flask_caching import Cache
+from cachelib import BaseCache
+
+from app.services.page_loader import load_page_parts
+from app.signals import page_saved
 
 cache = Cache()
 
+# backends that already live inside the worker process
+PROCESS_LOCAL_BACKENDS = ('simple', 'SimpleCache', 'null', 'NullCache')
+
+LEGACY_BACKEND_NAMES = {
+    'simple': 'SimpleCache',
+    'null': 'NullCache',
+    'redis': 'RedisCache',
+    'memcached': 'MemcachedCache'
+}
+
+
+class LocalCache:
+    """
+    Small in-process L1 kept in front of a shared cache backend.
+    Entries live at most `timeout` seconds, which bounds how long a
+    worker can serve a value another worker has replaced. Values are
+    returned as stored, so callers must not mutate them.
+    """
+
+    def __init__(self, timeout=0, max_entries=1000):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, timeout, max_entries=1000):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.clear()
+
+    def get(self, key):
+        if not self.timeout:
+            return None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, timeout=None):
+        if not self.timeout:
+            return
+        ttl = min(self.timeout, timeout) if timeout else self.timeout
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (value, time.monotonic() + ttl)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+local_cache = LocalCache()
+
 
 def init_cache(app):
-    """Initialize cache with the Flask app"""
-    cache.init_app(app, config={
-        'CACHE_TYPE': 'simple',
-        'CACHE_DEFAULT_TIMEOUT': 300
-    })
+    """
+    Initialize cache with the Flask app.
+    CACHE_TYPE picks the backend (e.g. RedisCache with CACHE_REDIS_URL so
+    all workers share one cache). Shared backends get a short-lived
+    in-process L1 (CACHE_L1_TIMEOUT) in front of them.
+    """
+    cache_type = app.config.get('CACHE_TYPE', 'SimpleCache')
+    cache_type = LEGACY_BACKEND_NAMES.get(cache_type, cache_type)
+
+    config = {
+        'CACHE_TYPE': cache_type,
+        'CACHE_DEFAULT_TIMEOUT': app.config.get('CACHE_DEFAULT_TIMEOUT', 300),
+        'CACHE_KEY_PREFIX': app.config.get('CACHE_KEY_PREFIX', 'linkedin_insights:')
+    }
+    for option in ('CACHE_REDIS_URL', 'CACHE_OPTIONS', 'CACHE_MEMCACHED_SERVERS'):
+        if app.config.get(option):
+            config[option] = app.config[option]
+
+    cache.init_app(app, config=config)
+
+    l1_timeout = 0
+    if cache_type not in PROCESS_LOCAL_BACKENDS:
+        l1_timeout = app.config.get('CACHE_L1_TIMEOUT', 5)
+    local_cache.configure(l1_timeout, app.config.get('CACHE_L1_MAX_ENTRIES', 1000))
+
     return cache
 
 
+def cache_get(key):
+    """Read through the local L1 to the shared backend"""
+    value = local_cache.get(key)
+    if value is None:
+        value = cache.get(key)
+        if value is not None:
+            local_cache.set(key, value)
+    return value
+
+
+def cache_set(key, value, timeout=None):
+    cache.set(key, value, timeout=timeout)
+    local_cache.set(key, value, timeout)
+
+
+def cache_delete(key):
+    local_cache.delete(key)
+    cache.delete(key)
+
+
+def _set_entry(key, data, timeout):
+    """
+    Cache data with a soft TTL of `timeout`. The entry is kept for
+    PAGE_CACHE_STALE_TIMEOUT seconds longer so it can be served stale
+    while it is refreshed.
+    """
+    now = time.time()
+    stale_timeout = current_app.config.get('PAGE_CACHE_STALE_TIMEOUT', 0)
+    entry = {'data': data, 'cached_at': now, 'fresh_until': now + timeout}
+    cache_set(key, entry, timeout=timeout + stale_timeout)
+
+
+def _get_entry(key):
+    """Returns (data, stale_age) where stale_age is seconds past the soft TTL"""
+    entry = cache_get(key)
+    if entry is None:
+        return None, None
+    return entry['data'], max(0, time.time() - entry['fresh_until'])
+
+
+def _touch_entry(key, timeout, **updates):
+    """
+    Restart the soft TTL of a cached entry, keeping its data apart from
+    the given fields. Returns False if nothing is cached under key.
+    """
+    entry = cache_get(key)
+    if entry is None:
+        return False
+    # entries may be shared with the L1, so copy rather than mutate
+    _set_entry(key, dict(entry['data'], **updates) if updates else entry['data'], timeout)
+    return True
+
+
+def get_cached_page_entry(page_id):
+    """Get page data from cache, fresh or stale, with its stale age"""
+    return _get_entry(f"page_{page_id}")
+
+
 def get_cached_page(page_id):
-    """Get page data from cache"""
-    key = f"page_{page_id}"
-    return cache.get(key)
+    """Get page data from cache while it is fresh"""
+    data, stale_age = get_cached_page_entry(page_id)
+    return data if not stale_age else None
 
 
 def set_cached_page(page_id, data, timeout=300):
     """Store page data in cache"""
     key = f"page_{page_id}"
-    cache.set(key, data, timeout=timeout)
+    _set_entry(key, data, timeout)
+
+
+def touch_cached_page(page_id, timeout=300, **updates):
+    """Keep a cached page for another `timeout` seconds, updating only the given fields"""
+    return _touch_entry(f"page_{page_id}", timeout, **updates)
+
+
+# parts of a page response that are cached apart from the base page object
+PAGE_SLICES = ('posts', 'employees')
+
+# page columns that /api/pages/ listings filter on
+LISTING_FILTER_FIELDS = set(['created', 'name', 'industry', 'follower_count'])
+
+# page columns the facet counts are built from
+FACET_FIELDS = set(['created', 'industry', 'specialities'])
+
+
+def get_cached_page_slice_entry(page_id, name):
+    """Get a cached slice of a page, fresh or stale, with its stale age"""
+    return _get_entry(f"page_{page_id}_{name}")
+
+
+def get_cached_page_slice(page_id, name):
+    """Get a cached slice (posts or employees) of a page while it is fresh"""
+    data, stale_age = get_cached_page_slice_entry(page_id, name)
+    return data if not stale_age else None
+
+
+def set_cached_page_slice(page_id, name, data, timeout=300):
+    """Store a slice of a page in cache"""
+    _set_entry(f"page_{page_id}_{name}", data, timeout)
+
+
+def touch_cached_page_slice(page_id, name, timeout=300):
+    """Keep a cached slice of a page for another `timeout` seconds"""
+    return _touch_entry(f"page_{page_id}_{name}", timeout)
+
+
+def clear_page_slice(page_id, name):
+    """Remove one slice of a page from cache"""
+    cache_delete(f"page_{page_id}_{name}")
 
 
 def clear_page_cache(page_id):
-    """Remove page from cache"""
+    """Remove page and all of its slices from cache"""
     key = f"page_{page_id}"
-    cache.delete(key)
+    cache_delete(key)
+    for name in PAGE_SLICES:
+        clear_page_slice(page_id, name)
 
 
 def clear_all_cache():
     """Clear entire cache"""
-    cache.clear()
\ No newline at end of file
+    local_cache.clear()
+    cache.clear()
+
+
+def get_generation(name):
+    """
+    Current generation token for a family of cache keys.
+    Always read from the shared backend so a bump in one worker is seen
+    by all; keys built on it can then safely sit in the L1.
+    A missing counter (never set, or evicted) is seeded with a time-based
+    token rather than read as 0, so it can never land back on a
+    generation whose keys are still cached.
+    """
+    key = f"gen_{name}"
+    value = cache.get(key)
+    if value is None:
+        cache.add(key, time.time_ns(), timeout=0)
+        value = cache.get(key)
+    return value
+
+
+_generation_lock = threading.Lock()
+
+
+def bump_generation(name):
+    """Invalidate every key built on this generation"""
+    key = f"gen_{name}"
+    backend = cache.cache
+    if type(backend).inc is BaseCache.inc:
+        # the generic inc re-sets the key with the default timeout, so the
+        # counter would expire; rewrite it without one instead
+        with _generation_lock:
+            backend.set(key, (get_generation(name) or 0) + 1, timeout=0)
+        return
+    get_generation(name)
+    # server-side increment (redis, memcached) keeps the key's missing expiry
+    backend.inc(key)
+
+
+def _filters_digest(filters):
+    raw = json.dumps(filters, sort_keys=True, separators=(',', ':'))
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def _listing_key(filters, page, per_page):
+    return f"pages_list_{get_generation('pages_list')}_{_filters_digest(filters)}_{page}_{per_page}"
+
+
+def _total_key(filters):
+    return f"pages_total_{get_generation('pages_total')}_{_filters_digest(filters)}"
+
+
+def get_cached_listing(filters, page, per_page):
+    """Get one page of the /api/pages/ listing for a normalized filter set"""
+    return cache_get(_listing_key(filters, page, per_page))
+
+
+def set_cached_listing(filters, page, per_page, data, timeout=60):
+    cache_set(_listing_key(filters, page, per_page), data, timeout=timeout)
+
+
+def get_cached_total(filters):
+    """Get the total row count for a normalized filter set"""
+    return cache_get(_total_key(filters))
+
+
+def set_cached_total(filters, total, timeout=3600):
+    cache_set(_total_key(filters), total, timeout=timeout)
+
+
+def invalidate_page_listings(totals=True):
+    """
+    Drop cached listings after a page write. Totals only move when pages
+    are added or a filtered column changes, so callers can keep them.
+    """
+    bump_generation('pages_list')
+    if totals:
+        bump_generation('pages_total')
+
+
+def _analytics_key(page_id, days, start):
+    return f"analytics_{page_id}_{get_generation(f'analytics_{page_id}')}_{days}_{start}"
+
+
+def get_cached_analytics(page_id, days, start):
+    """Get a page's engagement series for a window from cache"""
+    return cache_get(_analytics_key(page_id, days, start))
+
+
+def set_cached_analytics(page_id, days, start, data, timeout=600):
+    """Store a page's engagement series for a window in cache"""
+    cache_set(_analytics_key(page_id, days, start), data, timeout=timeout)
+
+
+def invalidate_page_analytics(page_id):
+    """Drop every cached analytics window of a page"""
+    bump_generation(f"analytics_{page_id}")
+
+
+def get_cached_facets(limit):
+    """Get facet counts from cache"""
+    return cache_get(f"facets_{get_generation('facets')}_{limit}")
+
+
+def set_cached_facets(limit, data, timeout=3600):
+    """Store facet counts in cache"""
+    cache_set(f"facets_{get_generation('facets')}_{limit}", data, timeout=timeout)
+
+
+def warm_page_cache(page, slices=PAGE_SLICES):
+    """
+    Write the fresh serialization of a page, and the given slices, over
+    whatever is cached, so readers never see the pre-save version and
+    workers do not all miss at once after a refresh.
+    """
+    config = current_app.config
+    set_cached_page(page.page_id, page.to_dict(), timeout=config.get('PAGE_CACHE_TIMEOUT', 300))
+
+    base, posts, employees = load_page_parts(
+        page.page_id, include_base=False, page_pk=page.id,
+        include_posts='posts' in slices, include_employees='employees' in slices
+    )
+    if posts is not None:
+        set_cached_page_slice(page.page_id, 'posts', posts,
+                              timeout=config.get('PAGE_POSTS_CACHE_TIMEOUT', 300))
+    if employees is not None:
+        set_cached_page_slice(page.page_id, 'employees', employees,
+                              timeout=config.get('PAGE_EMPLOYEES_CACHE_TIMEOUT', 300))
+
+
+@page_saved.connect
+def _refresh_page_caches(sender, page, changes, **kwargs):
+    """Write-through for page detail caches and invalidation for listings"""
+    if changes['unchanged']:
+        # only last_checked_at moved: keep what is cached, just renew it
+        config = current_app.config
+        touch_cached_page(page.page_id, timeout=config.get('PAGE_CACHE_TIMEOUT', 300),
+                          last_checked_at=page.last_checked_at.isoformat())
+        touch_cached_page_slice(page.page_id, 'posts', timeout=config.get('PAGE_POSTS_CACHE_TIMEOUT', 300))
+        touch_cached_page_slice(page.page_id, 'employees', timeout=config.get('PAGE_EMPLOYEES_CACHE_TIMEOUT', 300))
+        return
+
+    warm_page_cache(page)
+
+    if changes['posts']:
+        invalidate_page_analytics(page.page_id)
+
+    if FACET_FIELDS.intersection(changes['page_fields']):
+        bump_generation('facets')
+
+    # totals only move when a page is added or a filtered column changes
+    invalidate_page_listings(totals=bool(LISTING_FILTER_FIELDS.intersection(changes['page_fields'])))
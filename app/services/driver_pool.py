@@ -0,0 +1,147 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class DriverPoolTimeout(Exception):
+    """Raised when no driver becomes free within the acquire timeout"""
+    pass
+
+
+class PooledDriver:
+    """A live WebDriver plus the bookkeeping needed to recycle it"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+        self.slots = None
+
+
+class DriverPool:
+    """
+    Bounded pool of long-lived WebDriver sessions.
+    Drivers are health checked when leased and recycled after
+    max_uses scrapes or when a scrape crashes them.
+    """
+
+    def __init__(self, factory=None, size=2, max_uses=50, acquire_timeout=120):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.acquire_timeout = acquire_timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def init_app(self, app):
+        self.configure(
+            size=app.config.get('CHROME_POOL_SIZE', self.size),
+            max_uses=app.config.get('CHROME_MAX_USES', self.max_uses),
+            acquire_timeout=app.config.get('CHROME_ACQUIRE_TIMEOUT', self.acquire_timeout)
+        )
+
+    def configure(self, size=None, max_uses=None, acquire_timeout=None, factory=None):
+        """Change pool settings; idle drivers are closed if the size changes"""
+        if factory is not None:
+            self.factory = factory
+        if max_uses is not None:
+            self.max_uses = max_uses
+        if acquire_timeout is not None:
+            self.acquire_timeout = acquire_timeout
+        if size is not None and size != self.size:
+            self.close_all()
+            self.size = size
+            self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout=None):
+        """Take a healthy driver from the pool, starting one if none are idle"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        slots = self._slots
+
+        if not slots.acquire(timeout=timeout):
+            raise DriverPoolTimeout(f"No browser free after {timeout}s")
+
+        try:
+            while True:
+                with self._lock:
+                    pooled = self._idle.pop() if self._idle else None
+
+                if pooled is None:
+                    pooled = PooledDriver(self.factory())
+                    break
+
+                if self._is_healthy(pooled.driver):
+                    break
+
+                logger.warning("Discarding unresponsive browser session")
+                self._quit(pooled)
+        except Exception:
+            slots.release()
+            raise
+
+        pooled.slots = slots
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """Return a driver to the pool, or close it if it is spent or broken"""
+        pooled.uses += 1
+        slots = pooled.slots
+
+        if discard or pooled.uses >= self.max_uses or slots is not self._slots:
+            self._quit(pooled)
+        else:
+            with self._lock:
+                self._idle.append(pooled)
+
+        slots.release()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Context manager yielding a driver; crashes discard the session"""
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.driver
+        except Exception:
+            self.release(pooled, discard=True)
+            raise
+        else:
+            self.release(pooled)
+
+    def idle_count(self):
+        with self._lock:
+            return len(self._idle)
+
+    def close_all(self):
+        """Quit every idle driver"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._quit(pooled)
+
+    def _is_healthy(self, driver):
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _quit(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing browser session: {str(e)}")
+
+
+driver_pool = DriverPool()
+atexit.register(driver_pool.close_all)
+
+
+def init_driver_pool(app, factory=None):
+    """Initialize the shared browser pool with the Flask app"""
+    driver_pool.init_app(app)
+    if factory is not None:
+        driver_pool.configure(factory=factory)
+    return driver_pool
@@ -0,0 +1,245 @@
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.services.cache_service import cache
+
+logger = logging.getLogger(__name__)
+
+
+class ScrapeJob:
+    """A queued scrape request and its progress"""
+
+    def __init__(self, page_id):
+        self.id = uuid.uuid4().hex
+        self.page_id = page_id
+        self.status = 'queued'
+        self.progress = 'queued'
+        self.result = None
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+        # set by the queue while the job runs, to publish progress
+        self.on_update = None
+
+    def update(self, progress):
+        """Record the stage the job has reached"""
+        self.progress = progress
+        if self.on_update:
+            self.on_update()
+
+    @property
+    def is_active(self):
+        return self.status in ('queued', 'running')
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a job from its stored to_dict() form"""
+        job = cls(data['page_id'])
+        job.id = data['job_id']
+        job.status = data['status']
+        job.progress = data['progress']
+        job.result = data['result']
+        job.error = data['error']
+        for field in ('created_at', 'started_at', 'finished_at'):
+            setattr(job, field, datetime.fromisoformat(data[field]) if data[field] else None)
+        return job
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'page_id': self.page_id,
+            'status': self.status,
+            'progress': self.progress,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class JobQueue:
+    """
+    Runs scrape jobs on a bounded worker pool so request threads
+    return immediately instead of waiting on Selenium.
+    Job state is also written to the shared cache, so with a shared
+    backend (e.g. RedisCache) any worker process can report on a job,
+    and submit_unique finds or queues a page's job as one step across
+    processes.
+    Settings are read from <config_prefix>_WORKERS, _JOB_HISTORY,
+    _JOB_TTL, _JOB_TIMEOUT and _QUEUE_EAGER, so other background work
+    can get its own queue.
+    """
+
+    def __init__(self, config_prefix='SCRAPE', max_workers=4, max_history=500):
+        self.app = None
+        self.config_prefix = config_prefix
+        self.max_workers = max_workers
+        self.max_history = max_history
+        # how long finished jobs can be looked up, and how long a job
+        # may hold its page before another can be queued
+        self.job_ttl = 3600
+        self.job_timeout = 600
+        self.eager = False
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        prefix = self.config_prefix
+        self.max_workers = app.config.get(f'{prefix}_WORKERS', self.max_workers)
+        self.max_history = app.config.get(f'{prefix}_JOB_HISTORY', self.max_history)
+        self.job_ttl = app.config.get(f'{prefix}_JOB_TTL', self.job_ttl)
+        self.job_timeout = app.config.get(f'{prefix}_JOB_TIMEOUT', self.job_timeout)
+        self.eager = app.config.get(f'{prefix}_QUEUE_EAGER', False)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f'{self.config_prefix.lower()}-worker'
+                )
+            return self._executor
+
+    def _active_key(self, page_id):
+        return f"job_active_{self.config_prefix.lower()}_{page_id}"
+
+    def _save(self, job):
+        cache.set(f"job_{job.id}", job.to_dict(), timeout=self.job_ttl)
+
+    def _register(self, job):
+        """Track a new job locally; call with the lock held"""
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.max_history:
+            oldest_id = next(iter(self._jobs))
+            if self._jobs[oldest_id].is_active:
+                break
+            self._jobs.pop(oldest_id)
+
+    def submit(self, page_id, func):
+        """
+        Queue func(job) to run in a worker with an app context.
+        Returns the job straight away.
+        """
+        job = ScrapeJob(page_id)
+
+        with self._lock:
+            self._register(job)
+        self._save(job)
+
+        self._start(job, func)
+        return job
+
+    def submit_unique(self, page_id, func):
+        """
+        Return (job, created): the queued or running job for page_id if
+        there is one in any process, otherwise a new job running func.
+        """
+        with self._lock:
+            job = self._find_local(page_id)
+            if job:
+                return job, False
+
+            job = ScrapeJob(page_id)
+            key = self._active_key(page_id)
+            # cache.add only succeeds for one caller across processes
+            for _ in range(3):
+                if cache.add(key, job.id, timeout=self.job_timeout):
+                    break
+                holder_id = cache.get(key)
+                holder = (self._jobs.get(holder_id) or self._load(holder_id)) if holder_id else None
+                if holder and holder.is_active:
+                    return holder, False
+                # the claim is left over from a finished or lost job; clear it and retry
+                if cache.get(key) == holder_id:
+                    cache.delete(key)
+            else:
+                logger.warning(f"Could not claim {key}, queueing anyway")
+
+            self._register(job)
+        self._save(job)
+
+        self._start(job, func)
+        return job, True
+
+    def _start(self, job, func):
+        if self.eager:
+            self._run(job, func)
+        else:
+            self._get_executor().submit(self._run, job, func)
+
+    def _find_local(self, page_id):
+        for job in reversed(self._jobs.values()):
+            if job.page_id == page_id and job.is_active:
+                return job
+        return None
+
+    def find_active(self, page_id):
+        """Return the queued or running job for page_id, if any"""
+        with self._lock:
+            job = self._find_local(page_id)
+        if job:
+            return job
+
+        holder_id = cache.get(self._active_key(page_id))
+        holder = self.get(holder_id) if holder_id else None
+        return holder if holder and holder.is_active else None
+
+    def get(self, job_id):
+        """Look up a job by id, in this process or in the shared cache"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job or self._load(job_id)
+
+    def _load(self, job_id):
+        data = cache.get(f"job_{job_id}")
+        return ScrapeJob.from_dict(data) if data else None
+
+    def _run(self, job, func):
+        with self.app.app_context():
+            job.status = 'running'
+            job.started_at = datetime.utcnow()
+            job.on_update = lambda: self._save(job)
+            self._save(job)
+
+            try:
+                job.result = func(job)
+                job.status = 'completed'
+                job.update('done')
+            except Exception as e:
+                logger.error(f"Scrape job {job.id} for {job.page_id} failed: {str(e)}")
+                job.status = 'failed'
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.utcnow()
+                job.on_update = None
+                self._save(job)
+                key = self._active_key(job.page_id)
+                if cache.get(key) == job.id:
+                    cache.delete(key)
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=wait)
+
+
+job_queue = JobQueue()
+
+# background re-reads of stale cache entries
+refresh_queue = JobQueue('CACHE_REFRESH', max_workers=2, max_history=100)
+
+
+def init_job_queue(app):
+    """Initialize the scrape job queue and the cache refresh queue with the Flask app"""
+    job_queue.init_app(app)
+    refresh_queue.init_app(app)
+    return job_queue
@@ -0,0 +1,111 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from sqlalchemy import and_, func
+
+from app.models import db, Page, Post, User
+from app.serializers import page_serializer, post_serializer, user_serializer
+
+# columns each serializer reads
+PAGE_COLUMNS = list(page_serializer.fields)
+POST_COLUMNS = list(post_serializer.fields)
+USER_COLUMNS = list(user_serializer.fields)
+
+POSTS_LIMIT = 15
+EMPLOYEES_LIMIT = 20
+
+
+def load_page_parts(page_id, include_base=True, include_posts=False, include_employees=False, page_pk=None,
+                    page_fields=None):
+    """
+    Load the serialized parts of a page detail response straight from
+    row tuples, without hydrating ORM objects. The page and its first
+    posts come back from one joined query and the employees from a
+    second, so any combination costs at most two queries.
+    page_pk skips the page lookup when the base is already known, and
+    page_fields selects only those page columns (id is always included).
+    Returns (base, posts, employees); parts not asked for are None, and
+    all three are None if the page does not exist.
+    """
+    pages = Page.__table__
+    posts_table = Post.__table__
+    users = User.__table__
+
+    base = posts = employees = None
+
+    if page_pk is None:
+        page_pk = db.select(pages.c.id).where(pages.c.page_id == page_id).scalar_subquery()
+
+    if include_base:
+        names = PAGE_COLUMNS
+        if page_fields is not None:
+            names = [name for name in PAGE_COLUMNS if name in page_fields or name == 'id']
+        columns = [pages.c[name] for name in names]
+
+        if include_posts:
+            numbered = _numbered_posts(page_pk)
+            query = (
+                db.select(*columns, *[numbered.c[name].label(f'post_{name}') for name in POST_COLUMNS])
+                .select_from(pages.outerjoin(numbered, and_(
+                    numbered.c.page_id == pages.c.id, numbered.c.position <= POSTS_LIMIT
+                )))
+                .where(pages.c.page_id == page_id)
+            )
+            rows = db.session.execute(query).all()
+            if not rows:
+                return None, None, None
+            base = _serialize_page(rows[0], names)
+            # at most POSTS_LIMIT rows, so they are put in id order here rather than by a sort in the query
+            posts = sorted(
+                (
+                    Post.serialize(SimpleNamespace(**dict((name, row._mapping[f'post_{name}']) for name in POST_COLUMNS)))
+                    for row in rows if row._mapping['post_id'] is not None
+                ),
+                key=lambda post: post['id']
+            )
+        else:
+            row = db.session.execute(db.select(*columns).where(pages.c.page_id == page_id)).first()
+            if row is None:
+                return None, None, None
+            base = _serialize_page(row, names)
+
+        page_pk = base['id']
+
+    elif include_posts:
+        rows = db.session.execute(
+            db.select(*[posts_table.c[name] for name in POST_COLUMNS])
+            .where(posts_table.c.page_id == page_pk, posts_table.c.retired_at.is_(None))
+            .order_by(posts_table.c.id)
+            .limit(POSTS_LIMIT)
+        )
+        posts = [Post.serialize(row) for row in rows]
+
+    if include_employees:
+        rows = db.session.execute(
+            db.select(*[users.c[name] for name in USER_COLUMNS])
+            .where(users.c.company_id == page_pk)
+            .order_by(users.c.id)
+            .limit(EMPLOYEES_LIMIT)
+        )
+        employees = [User.serialize(row) for row in rows]
+
+    return base, posts, employees
+
+
+def _serialize_page(row, names):
+    """Page dict from a row; a partial row gives just its fields, in to_dict's form"""
+    if names is PAGE_COLUMNS:
+        return Page.serialize(row)
+    item = page_serializer.serialize([row], names)[0]
+    return dict((name, value.isoformat() if isinstance(value, datetime) else value) for name, value in item.items())
+
+
+def _numbered_posts(page_pk):
+    """A page's active posts numbered in id order"""
+    posts_table = Post.__table__
+    position = func.row_number().over(partition_by=posts_table.c.page_id, order_by=posts_table.c.id)
+    return (
+        db.select(posts_table.c.page_id, *[posts_table.c[name] for name in POST_COLUMNS], position.label('position'))
+        .where(posts_table.c.page_id == page_pk, posts_table.c.retired_at.is_(None))
+        .subquery()
+    )
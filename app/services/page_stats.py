@@ -0,0 +1,129 @@
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from app.models import db, Post, PageStats
+
+TOP_POSTS = 5
+
+
+def _engagement():
+    return (
+        func.coalesce(Post.like_count, 0)
+        + func.coalesce(Post.comment_count, 0)
+        + func.coalesce(Post.share_count, 0)
+    )
+
+
+def update_page_stats(page):
+    """
+    Recompute the page_stats row for one page from its active posts.
+    Two indexed reads over that page's posts, so it is called from the
+    save path whenever posts or the follower count change, inside the
+    same transaction. Does not commit.
+    """
+    active = db.and_(Post.page_id == page.id, Post.retired_at.is_(None))
+
+    row = db.session.execute(
+        db.select(
+            func.count(Post.id),
+            func.coalesce(func.sum(Post.like_count), 0),
+            func.coalesce(func.sum(Post.comment_count), 0),
+            func.coalesce(func.sum(Post.share_count), 0),
+            func.min(Post.posted_at),
+            func.max(Post.posted_at)
+        ).where(active)
+    ).one()
+    post_count, likes, comments, shares, first_posted_at, last_posted_at = row
+
+    top_ids = db.session.execute(
+        db.select(Post.linkedin_post_id)
+        .where(active, Post.linkedin_post_id.isnot(None))
+        .order_by(_engagement().desc(), Post.id)
+        .limit(TOP_POSTS)
+    ).scalars().all()
+
+    stats = db.session.get(PageStats, page.id)
+    if stats is None:
+        stats = PageStats(page_id=page.id)
+        db.session.add(stats)
+
+    stats.post_count = post_count
+    stats.total_likes = likes
+    stats.total_comments = comments
+    stats.total_shares = shares
+    stats.avg_likes = likes / post_count if post_count else 0
+    stats.avg_comments = comments / post_count if post_count else 0
+    stats.avg_shares = shares / post_count if post_count else 0
+
+    followers = page.follower_count or 0
+    per_post = (likes + comments + shares) / post_count if post_count else 0
+    stats.engagement_rate = per_post / followers if followers else 0
+
+    stats.first_posted_at = first_posted_at
+    stats.last_posted_at = last_posted_at
+    if first_posted_at and last_posted_at:
+        # anything under a week counts as one week
+        weeks = max((last_posted_at - first_posted_at).total_seconds() / 604800, 1)
+        stats.posts_per_week = post_count / weeks
+    else:
+        stats.posts_per_week = 0
+
+    stats.top_post_ids = ','.join(top_ids)
+    return stats
+
+
+def get_page_stats(page):
+    """The page's stats row, built on first use for pages saved before it existed"""
+    stats = db.session.get(PageStats, page.id)
+    if stats is None:
+        stats = update_page_stats(page)
+        db.session.commit()
+    return stats
+
+
+def _as_date(value):
+    # SQLite returns DATE() as a string, MySQL as a date
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def daily_engagement(page, since):
+    """
+    Post count and likes/comments/shares per day of posted_at for the
+    page's active posts since `since`, aggregated by the database.
+    Returns a list of dicts ordered by date.
+    """
+    day = func.date(Post.posted_at)
+    rows = db.session.execute(
+        db.select(
+            day,
+            func.count(Post.id),
+            func.coalesce(func.sum(Post.like_count), 0),
+            func.coalesce(func.sum(Post.comment_count), 0),
+            func.coalesce(func.sum(Post.share_count), 0)
+        )
+        .where(Post.page_id == page.id, Post.retired_at.is_(None), Post.posted_at >= since)
+        .group_by(day)
+        .order_by(day)
+    ).all()
+
+    return [
+        {'date': _as_date(d).isoformat(), 'posts': posts, 'likes': likes, 'comments': comments, 'shares': shares}
+        for d, posts, likes, comments, shares in rows
+    ]
+
+
+def weekly_rollup(daily):
+    """Sum daily buckets into ISO weeks, keyed by the Monday they start on"""
+    weeks = {}
+    for bucket in daily:
+        day = date.fromisoformat(bucket['date'])
+        week_start = (day - timedelta(days=day.weekday())).isoformat()
+        week = weeks.setdefault(week_start, {'week_start': week_start, 'posts': 0, 'likes': 0, 'comments': 0, 'shares': 0})
+        for field in ('posts', 'likes', 'comments', 'shares'):
+            week[field] += bucket[field]
+    return [weeks[key] for key in sorted(weeks)]
@@ -0,0 +1,413 @@
+import json
+import hashlib
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, or_
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import db, Page, Post, User, Comment
+from app.signals import page_saved
+from app.services.page_stats import update_page_stats
+from app.services.search import update_search_index
+from app.services.taxonomy import sync_page_taxonomy, needs_taxonomy_sync
+
+PAGE_FIELDS = [
+    'name', 'linkedin_id', 'url', 'profile_picture', 'description', 'website',
+    'industry', 'follower_count', 'employee_count', 'specialities',
+    'headquarters', 'founded_year', 'company_type'
+]
+
+# posted_at is an estimate from the scraper, so it is only written on insert
+POST_FIELDS = ['content', 'post_url', 'media_url', 'media_type', 'like_count', 'comment_count', 'share_count']
+
+POST_DEFAULTS = {'like_count': 0, 'comment_count': 0, 'share_count': 0}
+
+# estimated relative to now by the scraper and never updated once stored,
+# so they are left out of the content hash
+UNHASHED_FIELDS = frozenset(['posted_at', 'commented_at'])
+
+EMPLOYEE_FIELDS = ['company_id', 'job_title', 'headline', 'profile_url', 'profile_picture', 'location']
+
+
+def save_scraped_data(data):
+    """Save scraped data to database."""
+    page, changes = persist_scraped_data(data)
+    return page
+
+
+def persist_scraped_data(data):
+    """
+    Save scraped data to database, writing only what changed.
+    Posts are matched on linkedin_post_id: changed ones are updated, new
+    ones inserted and ones no longer on the page retired. Employees are
+    matched by full name the same way. Everything is done with set-based
+    statements, so round trips do not grow with the number of rows.
+    If the scrape hashes the same as the last one stored for the page, or
+    syncing it changes nothing, only last_checked_at (and the hash) is
+    written and the save is reported as unchanged.
+    Sends page_saved after committing so caches can refresh.
+    Returns the page and a summary of the changes.
+    """
+    now = datetime.utcnow()
+    content_hash = hash_scraped_data(data)
+    page = Page.query.filter_by(page_id=data['page_id']).first()
+
+    if page and page.content_hash == content_hash:
+        return _save_unchanged(page, content_hash, now, {})
+
+    page, page_fields = _upsert_page(page, data)
+    if page_fields:
+        page.content_hash = content_hash
+        page.last_checked_at = now
+        page.updated_at = now
+        db.session.flush()
+
+    changes = {
+        'page_id': page.page_id,
+        'unchanged': False,
+        'page_fields': page_fields,
+        'posts': None,
+        'employees': None
+    }
+
+    if 'posts' in data and data['posts']:
+        changes['posts'] = _sync_posts(page, data['page_id'], data['posts'])
+
+    if 'employees' in data and data['employees']:
+        changes['employees'] = _sync_employees(page, data['employees'])
+
+    if not page_fields and not _rows_changed(changes):
+        # the scrape only differs in what is not stored
+        return _save_unchanged(page, content_hash, now, changes)
+
+    if not page_fields:
+        page.content_hash = content_hash
+        page.last_checked_at = now
+        page.updated_at = now
+
+    if _stats_changed(changes):
+        update_page_stats(page)
+
+    update_search_index(page, changes)
+
+    if needs_taxonomy_sync(changes):
+        sync_page_taxonomy(page)
+
+    db.session.commit()
+
+    page_saved.send(current_app._get_current_object(), page=page, changes=changes)
+
+    return page, changes
+
+
+def _save_unchanged(page, content_hash, now, changes):
+    """Record the check (and the new hash) on a page whose stored data did not change"""
+    # keep updated_at as is; the column's onupdate would otherwise bump it
+    pages_table = Page.__table__
+    values = {'last_checked_at': now, 'updated_at': pages_table.c.updated_at}
+    if page.content_hash != content_hash:
+        values['content_hash'] = content_hash
+    db.session.execute(pages_table.update().where(pages_table.c.id == page.id).values(values))
+    set_committed_value(page, 'last_checked_at', now)
+    set_committed_value(page, 'content_hash', content_hash)
+    db.session.commit()
+
+    changes = {
+        'page_id': page.page_id,
+        'unchanged': True,
+        'page_fields': [],
+        'posts': changes.get('posts'),
+        'employees': changes.get('employees')
+    }
+    page_saved.send(current_app._get_current_object(), page=page, changes=changes)
+    return page, changes
+
+
+def _rows_changed(changes):
+    """Whether syncing the posts or employees wrote anything"""
+    posts = changes['posts']
+    if posts and (posts['added'] or posts['updated'] or posts['retired'] or posts['comments_replaced']):
+        return True
+    employees = changes['employees']
+    return bool(employees and (employees['added'] or employees['updated'] or employees['removed']))
+
+
+def _stats_changed(changes):
+    """Whether a save touched anything page_stats is computed from"""
+    if set(['created', 'follower_count']).intersection(changes['page_fields']):
+        return True
+    posts = changes['posts']
+    return bool(posts and (posts['added'] or posts['updated'] or posts['retired']))
+
+
+def _normalize(value):
+    """Make a scraped value hashable in a stable way"""
+    if isinstance(value, dict):
+        return dict((k, _normalize(v)) for k, v in value.items() if k not in UNHASHED_FIELDS)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, datetime):
+        # scraped timestamps are estimates relative to now; only the day is meaningful
+        return value.date().isoformat()
+    return value
+
+
+def hash_scraped_data(data):
+    """SHA-256 of the normalized scrape payload"""
+    payload = json.dumps(_normalize(data), sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _upsert_page(page, data):
+    """Insert or update the page row; returns it and the fields that changed"""
+    if page:
+        changed = []
+        for field in PAGE_FIELDS:
+            value = data.get(field, getattr(page, field))
+            if value != getattr(page, field):
+                setattr(page, field, value)
+                changed.append(field)
+    else:
+        page = Page(
+            page_id=data['page_id'],
+            linkedin_id=data.get('linkedin_id'),
+            name=data.get('name', data['page_id']),
+            url=data.get('url'),
+            profile_picture=data.get('profile_picture'),
+            description=data.get('description'),
+            website=data.get('website'),
+            industry=data.get('industry'),
+            follower_count=data.get('follower_count', 0),
+            employee_count=data.get('employee_count', 0),
+            specialities=data.get('specialities'),
+            headquarters=data.get('headquarters'),
+            founded_year=data.get('founded_year'),
+            company_type=data.get('company_type')
+        )
+        db.session.add(page)
+        changed = ['created']
+
+    return page, changed
+
+
+def post_key(page_id, index, post_data):
+    """linkedin_post_id of a scraped post, or a stable stand-in when missing"""
+    return post_data.get('linkedin_post_id') or f"{page_id}_post_{index}"
+
+
+def _comment_signature(comments):
+    return [
+        (c.get('author_name'), c.get('content'), c.get('like_count', 0))
+        for c in comments
+    ]
+
+
+def _sync_posts(page, page_id, posts):
+    """Bring the page's posts and comments in line with the scraped ones"""
+    posts_table = Post.__table__
+    comments_table = Comment.__table__
+    now = datetime.utcnow()
+
+    # the same post can show up twice while the feed is scrolling; keep the last copy
+    scraped = {}
+    for index, post_data in enumerate(posts):
+        scraped[post_key(page_id, index, post_data)] = post_data
+
+    columns = [posts_table.c.id, posts_table.c.linkedin_post_id, posts_table.c.retired_at, posts_table.c.posted_at]
+    columns += [posts_table.c[field] for field in POST_FIELDS]
+    existing = {
+        row.linkedin_post_id: row
+        for row in db.session.execute(db.select(*columns).where(posts_table.c.page_id == page.id))
+    }
+
+    existing_comments = {}
+    for row in db.session.execute(
+        db.select(comments_table.c.post_id, comments_table.c.author_name,
+                  comments_table.c.content, comments_table.c.like_count)
+        .where(comments_table.c.post_id.in_(
+            db.select(posts_table.c.id).where(posts_table.c.page_id == page.id)
+        ))
+        .order_by(comments_table.c.id)
+    ):
+        existing_comments.setdefault(row.post_id, []).append((row.author_name, row.content, row.like_count))
+
+    updates = []
+    inserts = []
+    comment_posts = {}
+    # posts whose indexed text was added, edited, restored or retired
+    content_changed = []
+    unchanged = 0
+
+    for key, post_data in scraped.items():
+        values = dict(
+            (field, post_data.get(field, POST_DEFAULTS.get(field))) for field in POST_FIELDS
+        )
+        row = existing.get(key)
+
+        if row is None:
+            values.update(page_id=page.id, linkedin_post_id=key, posted_at=post_data.get('posted_at'))
+            inserts.append(values)
+            content_changed.append(key)
+            if post_data.get('comments'):
+                comment_posts[key] = post_data['comments']
+            continue
+
+        if row.posted_at is None and post_data.get('posted_at'):
+            values['posted_at'] = post_data['posted_at']
+
+        if row.retired_at is not None or row.content != values['content']:
+            content_changed.append(key)
+
+        if row.retired_at is not None or any(getattr(row, f) != v for f, v in values.items()):
+            params = dict((f'b_{field}', values.get(field, getattr(row, field))) for field in POST_FIELDS)
+            params['b_posted_at'] = values.get('posted_at', row.posted_at)
+            params['b_id'] = row.id
+            updates.append(params)
+        else:
+            unchanged += 1
+
+        if 'comments' in post_data:
+            scraped_comments = post_data['comments'] or []
+            if _comment_signature(scraped_comments) != existing_comments.get(row.id, []):
+                comment_posts[key] = scraped_comments
+
+    retired = [
+        (key, row.id) for key, row in existing.items()
+        if key not in scraped and row.retired_at is None
+    ]
+    retired_ids = [row_id for key, row_id in retired]
+    content_changed.extend(key for key, row_id in retired)
+
+    if updates:
+        db.session.execute(
+            posts_table.update()
+            .where(posts_table.c.id == bindparam('b_id'))
+            .values(dict(
+                [(field, bindparam(f'b_{field}')) for field in POST_FIELDS + ['posted_at']],
+                retired_at=None
+            )),
+            updates
+        )
+
+    if retired_ids:
+        db.session.execute(
+            posts_table.update().where(posts_table.c.id.in_(retired_ids)).values(retired_at=now)
+        )
+
+    if inserts:
+        db.session.execute(posts_table.insert(), inserts)
+
+    if comment_posts:
+        post_ids = dict((key, row.id) for key, row in existing.items() if key in comment_posts)
+
+        new_keys = [key for key in comment_posts if key not in post_ids]
+        if new_keys:
+            # map the natural key back to the ids the database just assigned
+            post_ids.update(db.session.execute(
+                db.select(posts_table.c.linkedin_post_id, posts_table.c.id)
+                .where(posts_table.c.page_id == page.id, posts_table.c.linkedin_post_id.in_(new_keys))
+            ).all())
+
+        replaced = [post_ids[key] for key in comment_posts if key in existing]
+        if replaced:
+            db.session.execute(comments_table.delete().where(comments_table.c.post_id.in_(replaced)))
+
+        comment_rows = [
+            {
+                'post_id': post_ids[key],
+                'author_name': comment_data.get('author_name'),
+                'author_profile_url': comment_data.get('author_profile_url'),
+                'content': comment_data.get('content'),
+                'like_count': comment_data.get('like_count', 0),
+                'commented_at': comment_data.get('commented_at')
+            }
+            for key, comments in comment_posts.items()
+            for comment_data in comments
+        ]
+        if comment_rows:
+            db.session.execute(comments_table.insert(), comment_rows)
+
+    return {
+        'added': len(inserts),
+        'updated': len(updates),
+        'retired': len(retired_ids),
+        'unchanged': unchanged,
+        'comments_replaced': len(comment_posts),
+        'content_changed': content_changed
+    }
+
+
+def _sync_employees(page, employees):
+    """Point the scraped employees at the page, matching users by full name"""
+    users_table = User.__table__
+
+    scraped = {}
+    for emp_data in employees:
+        scraped[emp_data.get('full_name')] = emp_data
+
+    columns = [users_table.c.id, users_table.c.full_name] + [users_table.c[field] for field in EMPLOYEE_FIELDS]
+    rows = db.session.execute(
+        db.select(*columns)
+        .where(or_(users_table.c.company_id == page.id, users_table.c.full_name.in_(list(scraped))))
+        .order_by(users_table.c.id)
+    ).all()
+
+    # prefer a user already at this page when several share a name
+    existing = {}
+    for row in rows:
+        current = existing.get(row.full_name)
+        if current is None or (current.company_id != page.id and row.company_id == page.id):
+            existing[row.full_name] = row
+
+    matched_ids = set(existing[name].id for name in scraped if name in existing)
+    removed_ids = [row.id for row in rows if row.company_id == page.id and row.id not in matched_ids]
+
+    updates = []
+    inserts = []
+    unchanged = 0
+
+    for full_name, emp_data in scraped.items():
+        values = {
+            'company_id': page.id,
+            'job_title': emp_data.get('job_title') or emp_data.get('headline'),
+            'headline': emp_data.get('headline'),
+            'profile_url': emp_data.get('profile_url'),
+            'profile_picture': emp_data.get('profile_picture'),
+            'location': emp_data.get('location')
+        }
+        row = existing.get(full_name)
+
+        if row is None:
+            values['full_name'] = full_name
+            values['username'] = emp_data.get('username')
+            inserts.append(values)
+        elif any(getattr(row, field) != value for field, value in values.items()):
+            params = dict((f'b_{field}', value) for field, value in values.items())
+            params['b_id'] = row.id
+            updates.append(params)
+        else:
+            unchanged += 1
+
+    if removed_ids:
+        db.session.execute(
+            users_table.update().where(users_table.c.id.in_(removed_ids)).values(company_id=None)
+        )
+
+    if updates:
+        db.session.execute(
+            users_table.update()
+            .where(users_table.c.id == bindparam('b_id'))
+            .values(dict((field, bindparam(f'b_{field}')) for field in EMPLOYEE_FIELDS)),
+            updates
+        )
+
+    if inserts:
+        db.session.execute(users_table.insert(), inserts)
+
+    return {
+        'added': len(inserts),
+        'updated': len(updates),
+        'removed': len(removed_ids),
+        'unchanged': unchanged
+    }
@@ -0,0 +1,162 @@
+import uuid
+import logging
+from datetime import datetime, timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from app.models import db, Page, PageStats, PageRanking
+from app.services.cache_service import cache
+from app.services.job_queue import refresh_queue
+from app.services.single_flight import acquire_db_lock, release_db_lock
+
+logger = logging.getLogger(__name__)
+
+# metric name -> column the pages are scored on
+METRICS = {
+    'follower_count': Page.follower_count,
+    'engagement_rate': PageStats.engagement_rate,
+    'post_velocity': PageStats.posts_per_week
+}
+
+# scrape_locks key held while a process rebuilds the boards
+REBUILD_LOCK_KEY = 'leaderboards:rebuild'
+
+# cache key set while a rebuild is queued, shared by all processes
+REBUILD_QUEUED_KEY = 'leaderboards_rebuild_queued'
+
+
+def industry_key(industry):
+    """Normalized industry name a board is stored under"""
+    return (industry or '').strip().lower()
+
+
+def rebuild_rankings():
+    """
+    Recompute every leaderboard: one board per metric across all pages,
+    and one per metric and industry. Replaces page_rankings in a single
+    transaction and returns the number of rows written.
+    """
+    table = PageRanking.__table__
+    now = datetime.utcnow()
+    rows = []
+
+    for metric, column in METRICS.items():
+        results = db.session.execute(
+            db.select(Page.id, Page.industry, func.coalesce(column, 0))
+            .select_from(Page)
+            .outerjoin(PageStats, PageStats.page_id == Page.id)
+            .order_by(func.coalesce(column, 0).desc(), Page.id)
+        ).all()
+
+        ranks = {}
+        for page_pk, industry, score in results:
+            boards = ['']
+            if industry_key(industry):
+                boards.append(industry_key(industry))
+            for board in boards:
+                ranks[board] = ranks.get(board, 0) + 1
+                rows.append({
+                    'metric': metric,
+                    'industry': board,
+                    'page_id': page_pk,
+                    'score': float(score),
+                    'rank': ranks[board],
+                    'built_at': now
+                })
+
+    db.session.execute(table.delete())
+    if rows:
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+    return len(rows)
+
+
+def rankings_built_at():
+    """
+    When the current leaderboards were built, or None if never. Every row
+    of a rebuild shares built_at, so the first place on the first board
+    is read through the board/rank index.
+    """
+    return db.session.execute(
+        db.select(PageRanking.built_at)
+        .where(PageRanking.metric == next(iter(METRICS)), PageRanking.industry == '', PageRanking.rank == 1)
+    ).scalar()
+
+
+def ensure_rankings(max_age):
+    """
+    Return when the current leaderboards were built, queueing a rebuild
+    on the refresh queue if they are missing or older than max_age
+    seconds. Readers are served the existing boards, stale or not, while
+    it runs. At most one rebuild is queued per max_age, so empty source
+    tables do not trigger one on every request.
+    """
+    built_at = rankings_built_at()
+    if built_at and datetime.utcnow() - built_at < timedelta(seconds=max_age):
+        return built_at
+
+    if cache.add(REBUILD_QUEUED_KEY, True, timeout=max(int(max_age), 1)):
+        refresh_queue.submit('leaderboards', run_rankings_rebuild)
+        # an eager queue has rebuilt by now
+        built_at = rankings_built_at()
+
+    return built_at
+
+
+def run_rankings_rebuild(job):
+    """
+    Worker body for a leaderboard rebuild. The scrape_locks row makes it
+    one rebuild across all processes; others skip theirs.
+    """
+    owner = uuid.uuid4().hex
+    if not acquire_db_lock(REBUILD_LOCK_KEY, owner, ttl=600):
+        return {'skipped': 'rebuild already running'}
+
+    try:
+        count = rebuild_rankings()
+        logger.info(f"Rebuilt leaderboards with {count} rows")
+        if count:
+            # the boards' age decides the next rebuild; with no rows, the marker holds it off
+            cache.delete(REBUILD_QUEUED_KEY)
+        return {'rows': count}
+    finally:
+        release_db_lock(REBUILD_LOCK_KEY, owner)
+
+
+def top_pages(metric, industry='', limit=10):
+    """The top `limit` entries of a board, in rank order"""
+    return db.session.execute(
+        db.select(PageRanking, Page)
+        .join(Page, Page.id == PageRanking.page_id)
+        .where(PageRanking.metric == metric, PageRanking.industry == industry_key(industry))
+        .order_by(PageRanking.rank)
+        .limit(limit)
+    ).all()
+
+
+def page_rank(page, metric, industry=''):
+    """The page's entry on a board, found through the board/page index"""
+    return db.session.execute(
+        db.select(PageRanking)
+        .where(
+            PageRanking.metric == metric,
+            PageRanking.industry == industry_key(industry),
+            PageRanking.page_id == page.id
+        )
+    ).scalar()
+
+
+@click.command('rebuild-rankings')
+@with_appcontext
+def rebuild_rankings_command():
+    """Rebuild the page leaderboards."""
+    count = rebuild_rankings()
+    click.echo(f"Rebuilt leaderboards with {count} rows")
+
+
+def init_rankings(app):
+    """Register the leaderboard CLI command with the Flask app"""
+    app.cli.add_command(rebuild_rankings_command)
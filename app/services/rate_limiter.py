@@ -0,0 +1,57 @@
+import time
+import threading
+
+
+class DomainRateLimiter:
+    """
+    Token bucket per domain. Callers reserve a token and sleep until it
+    is due, so concurrent scrapers against the same host queue up at
+    `rate` requests per second after an initial burst.
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate=0, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.configure(
+            rate=app.config.get('SCRAPE_DOMAIN_RATE', 0),
+            burst=app.config.get('SCRAPE_DOMAIN_BURST', 1)
+        )
+
+    def configure(self, rate=None, burst=None):
+        with self._lock:
+            if rate is not None:
+                self.rate = rate
+            if burst is not None:
+                self.burst = max(1, burst)
+            self._buckets = {}
+
+    def wait(self, domain):
+        """Block until a request to domain is allowed; returns seconds waited"""
+        if not self.rate:
+            return 0
+
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(domain, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            tokens -= 1
+            self._buckets[domain] = (tokens, now)
+            delay = -tokens / self.rate if tokens < 0 else 0
+
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+domain_limiter = DomainRateLimiter()
+
+
+def init_rate_limiter(app):
+    """Initialize per-domain scrape rate limiting with the Flask app"""
+    domain_limiter.init_app(app)
+    return domain_limiter
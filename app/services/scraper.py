@@ -1,7 +1,10 @@
 import time
 import random
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from urllib.parse import urlparse
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.service import Service
@@ -11,173 +14,198 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
 
+from app.services.driver_pool import driver_pool
+from app.services.rate_limiter import domain_limiter
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def _get_driver_path():
+    """Resolve the chromedriver binary once per process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def create_chrome_driver():
+    """Start a headless Chrome session"""
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
+    
+    service = Service(_get_driver_path())
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    driver.implicitly_wait(10)
+    return driver
+
+
 class LinkedInScraper:
     """
     Scraper class for extracting data from LinkedIn company pages.
     Uses Selenium for dynamic content and BeautifulSoup for parsing.
+    Browser sessions are leased from a shared DriverPool, so one
+    instance can be used from several threads at once.
     """
     
-    def __init__(self):
+    def __init__(self, pool=None, parallel_sections=False, rate_limiter=None):
         self.base_url = "https://www.linkedin.com/company"
-        self.driver = None
-        
-    def _setup_driver(self):
-        """Initialize Chrome driver with headless options"""
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36")
-        
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=chrome_options)
-        self.driver.implicitly_wait(10)
-        
-    def _close_driver(self):
-        """Clean up driver resources"""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
+        self.pool = pool or driver_pool
+        self.parallel_sections = parallel_sections
+        self.rate_limiter = rate_limiter or domain_limiter
+            
+    def _open(self, driver, url):
+        """Navigate to url once the per-domain rate limit allows it"""
+        self.rate_limiter.wait(urlparse(url).netloc)
+        driver.get(url)
             
     def _random_delay(self, min_sec=1, max_sec=3):
         """Add random delay to appear more human-like"""
         time.sleep(random.uniform(min_sec, max_sec))
         
-    def scrape_page(self, page_id):
+    def scrape_page(self, page_id, parallel=None):
         """
         Main method to scrape a LinkedIn company page.
         Returns dictionary with all scraped data.
+        With parallel=True the about, posts and people sections are
+        fetched at the same time on separate pooled browsers.
         """
         logger.info(f"Starting scrape for page: {page_id}")
         
+        if parallel is None:
+            parallel = self.parallel_sections
+        
         try:
-            self._setup_driver()
-            
-            page_data = self._scrape_basic_info(page_id)
-            if not page_data:
-                logger.warning(f"Could not scrape {page_id}, using mock data")
-                page_data = self._generate_mock_data(page_id)
-            
-            posts = self._scrape_posts(page_id)
-            page_data['posts'] = posts if posts else self._generate_mock_posts()
-            
-            employees = self._scrape_employees(page_id)
-            page_data['employees'] = employees if employees else self._generate_mock_employees()
-            
-            return page_data
+            if parallel:
+                basic_info, posts, employees = self._scrape_sections_parallel(page_id)
+            else:
+                with self.pool.lease() as driver:
+                    basic_info = self._scrape_basic_info(driver, page_id)
+                    posts = self._scrape_posts(driver, page_id)
+                    employees = self._scrape_employees(driver, page_id)
             
         except Exception as e:
-            logger.error(f"Scraping failed: {str(e)}")
-            return self._generate_mock_data(page_id)
-            
-        finally:
-            self._close_driver()
+            # a failed scrape must not be stored as if it were the page
+            logger.error(f"Scraping {page_id} failed: {str(e)}")
+            raise
+        
+        page_data = basic_info
+        if not page_data.get('name'):
+            logger.warning(f"Nothing found on {page_id}, using mock data")
+            page_data = self._generate_mock_data(page_id)
+        
+        page_data['posts'] = posts if posts else self._generate_mock_posts()
+        page_data['employees'] = employees if employees else self._generate_mock_employees()
+        
+        return page_data
+    
+    def _scrape_sections_parallel(self, page_id):
+        """Run each section scraper concurrently, each on its own leased driver"""
+        sections = [self._scrape_basic_info, self._scrape_posts, self._scrape_employees]
+        
+        with ThreadPoolExecutor(max_workers=len(sections), thread_name_prefix='scrape-section') as executor:
+            futures = [executor.submit(self._scrape_section, section, page_id) for section in sections]
+            return [future.result() for future in futures]
+    
+    def _scrape_section(self, section, page_id):
+        """Lease a driver and run one section scraper on it"""
+        with self.pool.lease() as driver:
+            return section(driver, page_id)
     
-    def _scrape_basic_info(self, page_id):
+    def _scrape_basic_info(self, driver, page_id):
         """Scrape basic company information"""
         url = f"{self.base_url}/{page_id}/about/"
         
-        try:
-            self.driver.get(url)
-            self._random_delay(2, 4)
-            
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            soup = BeautifulSoup(self.driver.page_source, 'lxml')
-            
-            data = {
-                'page_id': page_id,
-                'url': f"https://www.linkedin.com/company/{page_id}",
-                'name': self._extract_text(soup, 'h1'),
-                'description': self._extract_text(soup, '.org-top-card-summary__tagline'),
-                'industry': self._extract_text(soup, '.org-top-card-summary-info-list__info-item'),
-                'follower_count': self._parse_follower_count(soup),
-                'employee_count': self._parse_employee_count(soup),
-                'website': self._extract_website(soup),
-                'specialities': self._extract_specialities(soup),
-                'headquarters': self._extract_text(soup, '.org-location-card p'),
-                'profile_picture': self._extract_image(soup),
-                'linkedin_id': None,
-                'company_type': self._extract_company_type(soup),
-                'founded_year': self._extract_founded_year(soup)
-            }
-            
-            return data
-            
-        except Exception as e:
-            logger.error(f"Error scraping basic info: {str(e)}")
-            return None
+        self._open(driver, url)
+        self._random_delay(2, 4)
+        
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.TAG_NAME, "body"))
+        )
+        
+        soup = BeautifulSoup(driver.page_source, 'lxml')
+        
+        data = {
+            'page_id': page_id,
+            'url': f"https://www.linkedin.com/company/{page_id}",
+            'name': self._extract_text(soup, 'h1'),
+            'description': self._extract_text(soup, '.org-top-card-summary__tagline'),
+            'industry': self._extract_text(soup, '.org-top-card-summary-info-list__info-item'),
+            'follower_count': self._parse_follower_count(soup),
+            'employee_count': self._parse_employee_count(soup),
+            'website': self._extract_website(soup),
+            'specialities': self._extract_specialities(soup),
+            'headquarters': self._extract_text(soup, '.org-location-card p'),
+            'profile_picture': self._extract_image(soup),
+            'linkedin_id': None,
+            'company_type': self._extract_company_type(soup),
+            'founded_year': self._extract_founded_year(soup)
+        }
+        
+        return data
     
-    def _scrape_posts(self, page_id):
+    def _scrape_posts(self, driver, page_id):
         """Scrape recent posts from the company page"""
         url = f"{self.base_url}/{page_id}/posts/"
         posts = []
         
-        try:
-            self.driver.get(url)
-            self._random_delay(2, 4)
-            
-            for _ in range(3):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                self._random_delay(1, 2)
-            
-            soup = BeautifulSoup(self.driver.page_source, 'lxml')
-            post_elements = soup.find_all('div', class_='feed-shared-update-v2')[:20]
-            
-            for idx, post_elem in enumerate(post_elements):
-                post_data = {
-                    'linkedin_post_id': f"post_{page_id}_{idx}",
-                    'content': self._extract_text(post_elem, '.feed-shared-text'),
-                    'like_count': self._parse_engagement_count(post_elem, 'like'),
-                    'comment_count': self._parse_engagement_count(post_elem, 'comment'),
-                    'share_count': self._parse_engagement_count(post_elem, 'share'),
-                    'posted_at': datetime.utcnow() - timedelta(days=idx),
-                    'media_type': self._detect_media_type(post_elem),
-                    'comments': []
-                }
-                posts.append(post_data)
-                
-            return posts
+        self._open(driver, url)
+        self._random_delay(2, 4)
+        
+        for _ in range(3):
+            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            self._random_delay(1, 2)
+        
+        soup = BeautifulSoup(driver.page_source, 'lxml')
+        post_elements = soup.find_all('div', class_='feed-shared-update-v2')[:20]
+        
+        for idx, post_elem in enumerate(post_elements):
+            post_data = {
+                'linkedin_post_id': f"post_{page_id}_{idx}",
+                'content': self._extract_text(post_elem, '.feed-shared-text'),
+                'like_count': self._parse_engagement_count(post_elem, 'like'),
+                'comment_count': self._parse_engagement_count(post_elem, 'comment'),
+                'share_count': self._parse_engagement_count(post_elem, 'share'),
+                'posted_at': datetime.utcnow() - timedelta(days=idx),
+                'media_type': self._detect_media_type(post_elem),
+                'comments': []
+            }
+            posts.append(post_data)
             
-        except Exception as e:
-            logger.error(f"Error scraping posts: {str(e)}")
-            return None
+        return posts
     
-    def _scrape_employees(self, page_id):
+    def _scrape_employees(self, driver, page_id):
         """Scrape employee information"""
         url = f"{self.base_url}/{page_id}/people/"
         employees = []
         
-        try:
-            self.driver.get(url)
-            self._random_delay(2, 4)
-            
-            soup = BeautifulSoup(self.driver.page_source, 'lxml')
-            people_cards = soup.find_all('div', class_='org-people-profile-card')[:15]
-            
-            for card in people_cards:
-                emp_data = {
-                    'full_name': self._extract_text(card, '.org-people-profile-card__profile-title'),
-                    'headline': self._extract_text(card, '.lt-line-clamp'),
-                    'profile_url': self._extract_link(card, 'a'),
-                    'location': self._extract_text(card, '.org-people-profile-card__location'),
-                }
-                if emp_data['full_name']:
-                    employees.append(emp_data)
-                    
-            return employees
-            
-        except Exception as e:
-            logger.error(f"Error scraping employees: {str(e)}")
-            return None
+        self._open(driver, url)
+        self._random_delay(2, 4)
+        
+        soup = BeautifulSoup(driver.page_source, 'lxml')
+        people_cards = soup.find_all('div', class_='org-people-profile-card')[:15]
+        
+        for card in people_cards:
+            emp_data = {
+                'full_name': self._extract_text(card, '.org-people-profile-card__profile-title'),
+                'headline': self._extract_text(card, '.lt-line-clamp'),
+                'profile_url': self._extract_link(card, 'a'),
+                'location': self._extract_text(card, '.org-people-profile-card__location'),
+            }
+            if emp_data['full_name']:
+                employees.append(emp_data)
+                
+        return employees
     
     def _extract_text(self, soup, selector):
         """Safely extract text from element"""
@@ -0,0 +1,200 @@
+import re
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import case, func, literal, or_
+
+from app.models import db, Page, Post, SearchTerm
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+MIN_TERM_LENGTH = 2
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TERMS = 8
+
+# how much a term counts for, depending on where it was found
+FIELD_WEIGHTS = {
+    'name': 5.0,
+    'specialities': 3.0,
+    'description': 1.0,
+    'content': 1.0
+}
+
+# a prefix match is worth less than the whole word
+PREFIX_FACTOR = 0.5
+
+# page columns whose change means the page's own terms must be re-indexed
+INDEXED_PAGE_FIELDS = set(['created', 'name', 'description', 'specialities'])
+
+
+def tokenize(text):
+    """Lowercased word tokens of text, without very short ones"""
+    if not text:
+        return []
+    return [
+        token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text.lower())
+        if len(token) >= MIN_TERM_LENGTH
+    ]
+
+
+def _weigh(fields):
+    """Term -> weight for one document from (field, text) pairs"""
+    weights = {}
+    for field, text in fields:
+        for token in tokenize(text):
+            weights[token] = weights.get(token, 0) + FIELD_WEIGHTS[field]
+    return weights
+
+
+def _page_rows(page):
+    page_terms = _weigh([
+        ('name', page.name), ('specialities', page.specialities), ('description', page.description)
+    ])
+    return [
+        {'term': term, 'doc_type': 'page', 'doc_id': page.id, 'page_id': page.id, 'weight': weight}
+        for term, weight in page_terms.items()
+    ]
+
+
+def _post_rows(page, posts):
+    rows = []
+    for post_pk, content in posts:
+        rows.extend(
+            {'term': term, 'doc_type': 'post', 'doc_id': post_pk, 'page_id': page.id, 'weight': weight}
+            for term, weight in _weigh([('content', content)]).items()
+        )
+    return rows
+
+
+def index_page(page):
+    """
+    Replace the index entries of a page and its active posts. Runs in
+    the caller's transaction and does not commit.
+    """
+    table = SearchTerm.__table__
+
+    posts = db.session.execute(
+        db.select(Post.id, Post.content)
+        .where(Post.page_id == page.id, Post.retired_at.is_(None), Post.content.isnot(None))
+    ).all()
+    rows = _page_rows(page) + _post_rows(page, posts)
+
+    db.session.execute(table.delete().where(table.c.page_id == page.id))
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return len(rows)
+
+
+def index_page_terms(page):
+    """Replace the index entries of the page itself, leaving its posts' alone"""
+    table = SearchTerm.__table__
+    rows = _page_rows(page)
+
+    db.session.execute(
+        table.delete().where(table.c.doc_type == 'page', table.c.doc_id == page.id)
+    )
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return len(rows)
+
+
+def index_posts(page, post_keys):
+    """
+    Replace the index entries of the page's posts with these
+    linkedin_post_ids; retired ones are dropped from the index.
+    """
+    table = SearchTerm.__table__
+
+    posts = db.session.execute(
+        db.select(Post.id, Post.content, Post.retired_at)
+        .where(Post.page_id == page.id, Post.linkedin_post_id.in_(list(post_keys)))
+    ).all()
+    if not posts:
+        return 0
+
+    live = [(post_pk, content) for post_pk, content, retired_at in posts if retired_at is None and content]
+    rows = _post_rows(page, live)
+
+    db.session.execute(
+        table.delete().where(table.c.doc_type == 'post', table.c.doc_id.in_([row[0] for row in posts]))
+    )
+    if rows:
+        db.session.execute(table.insert(), rows)
+
+    return len(rows)
+
+
+def update_search_index(page, changes):
+    """
+    Re-index what a save changed: the page's terms when an indexed page
+    field moved, and only the posts whose content was added, edited or
+    retired. Engagement-only updates write nothing. Returns rows written.
+    """
+    count = 0
+    if INDEXED_PAGE_FIELDS.intersection(changes['page_fields']):
+        count += index_page_terms(page)
+    posts = changes['posts']
+    if posts and posts['content_changed']:
+        count += index_posts(page, posts['content_changed'])
+    return count
+
+
+def rebuild_search_index():
+    """Re-index every page; returns the number of index rows written"""
+    count = 0
+    for page in Page.query.order_by(Page.id).all():
+        count += index_page(page)
+    db.session.commit()
+    return count
+
+
+def search(q, doc_type=None, limit=20):
+    """
+    Documents matching every word of q, best first. Earlier words match
+    whole terms; the last also matches, at a lower weight, terms it is a
+    prefix of. Matching, intersection and ranking run in one query.
+    Returns a list of (doc_type, doc_id, score).
+    """
+    tokens = list(dict.fromkeys(tokenize(q)))[:MAX_QUERY_TERMS]
+    if not tokens:
+        return []
+
+    last = tokens[-1]
+    earlier = tokens[:-1]
+    term = SearchTerm.term
+
+    # a range on term works as an index prefix scan on every backend
+    prefix = (term >= last) & (term < last + '\uffff')
+    condition = or_(term.in_(earlier), prefix) if earlier else prefix
+
+    # which query word a row matched, so a document must match them all
+    matched = case((term.in_(earlier), term), else_=literal(last)) if earlier else literal(last)
+    score = func.sum(case((term.in_(tokens), SearchTerm.weight), else_=SearchTerm.weight * PREFIX_FACTOR))
+
+    query = (
+        db.select(SearchTerm.doc_type, SearchTerm.doc_id, score.label('score'))
+        .where(condition)
+        .group_by(SearchTerm.doc_type, SearchTerm.doc_id)
+        .having(func.count(matched.distinct()) == len(tokens))
+        .order_by(score.desc(), SearchTerm.doc_type, SearchTerm.doc_id)
+        .limit(limit)
+    )
+    if doc_type:
+        query = query.where(SearchTerm.doc_type == doc_type)
+
+    return [(found_type, doc_id, round(total, 2)) for found_type, doc_id, total in db.session.execute(query)]
+
+
+@click.command('rebuild-search-index')
+@with_appcontext
+def rebuild_search_index_command():
+    """Rebuild the search index over pages and posts."""
+    count = rebuild_search_index()
+    click.echo(f"Indexed {count} terms")
+
+
+def init_search(app):
+    """Register the search index CLI command with the Flask app"""
+    app.cli.add_command(rebuild_search_index_command)
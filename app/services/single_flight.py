@@ -0,0 +1,162 @@
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, ScrapeLock
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightTimeout(Exception):
+    """Raised when a follower gives up waiting on the leader"""
+    pass
+
+
+class _Call:
+    """An in-progress call that followers can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one.
+    The first caller runs the function; callers arriving while it runs
+    wait for it and share its result or exception. With the db lock
+    backend the same holds across processes through the scrape_locks
+    table; callers that waited on another process get None back and
+    should re-read what that process stored.
+    """
+
+    def __init__(self):
+        self.use_db_lock = False
+        self.lock_ttl = 300
+        self.wait_timeout = 120
+        self.poll_interval = 0.5
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.use_db_lock = app.config.get('SCRAPE_LOCK_BACKEND', 'local') == 'db'
+        self.lock_ttl = app.config.get('SCRAPE_LOCK_TTL', 300)
+        self.wait_timeout = app.config.get('SCRAPE_WAIT_TIMEOUT', 120)
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def do(self, key, func):
+        """Run func() once for all concurrent callers with this key"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise SingleFlightTimeout(f"Timed out waiting for {key}")
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(key, func)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def _run(self, key, func):
+        if not self.use_db_lock:
+            return func()
+
+        owner = uuid.uuid4().hex
+        if not acquire_db_lock(key, owner, self.lock_ttl):
+            logger.info(f"{key} is being scraped by another process, waiting")
+            wait_for_db_lock(key, self.wait_timeout, self.poll_interval)
+            # start a new transaction so the re-read sees what the other process committed
+            db.session.rollback()
+            return None
+
+        try:
+            return func()
+        finally:
+            release_db_lock(key, owner)
+
+
+def acquire_db_lock(key, owner, ttl=300):
+    """
+    Insert a row into scrape_locks for key. Runs on its own connection
+    so the lock is visible to other processes before the scrape starts.
+    Returns False if a live lock is already held.
+    """
+    table = ScrapeLock.__table__
+    now = datetime.utcnow()
+    values = {
+        'page_id': key,
+        'owner': owner,
+        'acquired_at': now,
+        'expires_at': now + timedelta(seconds=ttl)
+    }
+
+    for _ in range(2):
+        try:
+            with db.engine.begin() as conn:
+                conn.execute(table.insert().values(**values))
+            return True
+        except IntegrityError:
+            # clear a lock left behind by a crashed process, then retry once
+            with db.engine.begin() as conn:
+                expired = conn.execute(
+                    table.delete().where(table.c.page_id == key, table.c.expires_at < now)
+                )
+            if not expired.rowcount:
+                return False
+
+    return False
+
+
+def release_db_lock(key, owner):
+    """Drop the lock row if this owner still holds it"""
+    table = ScrapeLock.__table__
+    with db.engine.begin() as conn:
+        conn.execute(table.delete().where(table.c.page_id == key, table.c.owner == owner))
+
+
+def wait_for_db_lock(key, timeout=120, poll_interval=0.5):
+    """Poll until the lock on key is released or has expired"""
+    table = ScrapeLock.__table__
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        with db.engine.connect() as conn:
+            expires_at = conn.execute(
+                db.select(table.c.expires_at).where(table.c.page_id == key)
+            ).scalar()
+        if expires_at is None or expires_at < datetime.utcnow():
+            return
+        time.sleep(poll_interval)
+
+    raise SingleFlightTimeout(f"Timed out waiting for {key}")
+
+
+scrape_flight = SingleFlight()
+
+
+def init_single_flight(app):
+    """Initialize scrape de-duplication with the Flask app"""
+    scrape_flight.init_app(app)
+    return scrape_flight
@@ -0,0 +1,127 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from app.models import db, Page, Industry, Speciality, page_specialities
+
+# page columns the lookup tables are built from
+TAXONOMY_FIELDS = set(['created', 'industry', 'specialities'])
+
+
+def taxonomy_key(name):
+    """Normalized form industries and specialities are matched on"""
+    return (name or '').strip().lower()
+
+
+def split_specialities(specialities):
+    """Distinct specialities of a comma separated string, in order"""
+    names = {}
+    for name in (specialities or '').split(','):
+        name = name.strip()
+        if name and taxonomy_key(name) not in names:
+            names[taxonomy_key(name)] = name
+    return names
+
+
+def _get_or_create(model, names):
+    """Map key -> id for the given key -> display name, inserting missing rows"""
+    if not names:
+        return {}
+
+    def existing():
+        return dict(db.session.execute(
+            db.select(model.key, model.id).where(model.key.in_(list(names)))
+        ).all())
+
+    ids = existing()
+    missing = [{'key': key, 'name': name} for key, name in names.items() if key not in ids]
+
+    if missing:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(model.__table__.insert(), missing)
+        except IntegrityError:
+            # another writer added some of them first
+            pass
+        ids = existing()
+
+    return ids
+
+
+def sync_page_taxonomy(page):
+    """
+    Point the page at its industry and specialities lookup rows, adding
+    any that are new. Runs in the caller's transaction and does not commit.
+    """
+    industry = {}
+    if taxonomy_key(page.industry):
+        industry = {taxonomy_key(page.industry): page.industry.strip()}
+    industry_ids = _get_or_create(Industry, industry)
+    page.industry_id = industry_ids.get(taxonomy_key(page.industry))
+
+    speciality_ids = _get_or_create(Speciality, split_specialities(page.specialities))
+
+    db.session.execute(page_specialities.delete().where(page_specialities.c.page_id == page.id))
+    if speciality_ids:
+        db.session.execute(page_specialities.insert(), [
+            {'page_id': page.id, 'speciality_id': speciality_id} for speciality_id in speciality_ids.values()
+        ])
+
+
+def needs_taxonomy_sync(changes):
+    """Whether a save touched the industry or specialities of a page"""
+    return bool(TAXONOMY_FIELDS.intersection(changes['page_fields']))
+
+
+def rebuild_taxonomy():
+    """Link every page to its lookup rows; returns the number of pages"""
+    pages = Page.query.order_by(Page.id).all()
+    for page in pages:
+        sync_page_taxonomy(page)
+    db.session.commit()
+    return len(pages)
+
+
+def industry_ids_matching(term):
+    """Ids of industries whose name contains term; scans the small lookup table, not pages"""
+    return db.session.execute(
+        db.select(Industry.id).where(Industry.key.contains(taxonomy_key(term), autoescape=True))
+    ).scalars().all()
+
+
+def facet_counts(limit=50):
+    """Pages per industry and per speciality, most common first"""
+    industries = db.session.execute(
+        db.select(Industry.name, func.count(Page.id).label('count'))
+        .join(Page, Page.industry_id == Industry.id)
+        .group_by(Industry.id, Industry.name)
+        .order_by(func.count(Page.id).desc(), Industry.name)
+        .limit(limit)
+    ).all()
+
+    specialities = db.session.execute(
+        db.select(Speciality.name, func.count(page_specialities.c.page_id).label('count'))
+        .join(page_specialities, page_specialities.c.speciality_id == Speciality.id)
+        .group_by(Speciality.id, Speciality.name)
+        .order_by(func.count(page_specialities.c.page_id).desc(), Speciality.name)
+        .limit(limit)
+    ).all()
+
+    return {
+        'industries': [{'name': name, 'count': count} for name, count in industries],
+        'specialities': [{'name': name, 'count': count} for name, count in specialities]
+    }
+
+
+@click.command('rebuild-taxonomy')
+@with_appcontext
+def rebuild_taxonomy_command():
+    """Link all pages to the industry and speciality lookup tables."""
+    count = rebuild_taxonomy()
+    click.echo(f"Linked {count} pages")
+
+
+def init_taxonomy(app):
+    """Register the taxonomy CLI command with the Flask app"""
+    app.cli.add_command(rebuild_taxonomy_command)
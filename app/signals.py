@@ -0,0 +1,7 @@
+from blinker import Namespace
+
+_signals = Namespace()
+
+# sent by persist_scraped_data once a scrape is committed, with the app as
+# sender and page=, changes= keyword arguments; cache layers hook in here
+page_saved = _signals.signal('page-saved')
@@ -0,0 +1,93 @@
+"""
+Statements issued per save_scraped_data call.
+
+Runs against in-memory SQLite and prints, for growing numbers of posts
+and employees, how many SQL statements (and how many of them writes) a
+first save and an unchanged refresh of the same page execute, and how
+long they take.
+
+    python benchmarks/bench_save.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import db
+from app.services.persistence import save_scraped_data
+
+
+class BenchConfig:
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    CACHE_TYPE = 'SimpleCache'
+
+
+def make_payload(page_id, posts, employees, comments_per_post=3):
+    now = datetime.utcnow()
+    return {
+        'page_id': page_id,
+        'name': page_id.title(),
+        'follower_count': 12345,
+        'posts': [
+            {
+                'linkedin_post_id': f'{page_id}_{i}',
+                'content': f'Post {i}',
+                'like_count': i,
+                'posted_at': now - timedelta(days=i),
+                'comments': [
+                    {'author_name': f'Author {j}', 'content': f'Comment {j}'}
+                    for j in range(comments_per_post)
+                ]
+            }
+            for i in range(posts)
+        ],
+        'employees': [
+            {'full_name': f'{page_id} Employee {i}', 'headline': 'Engineer'}
+            for i in range(employees)
+        ]
+    }
+
+
+def count_statements(func):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.lstrip().split(None, 1)[0].upper())
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    writes = len([s for s in statements if s != 'SELECT'])
+    return len(statements), writes, elapsed
+
+
+def main():
+    app = create_app(BenchConfig)
+
+    with app.app_context():
+        db.create_all()
+
+        print(f"{'posts':>6} {'employees':>9} | {'first save':>27} | {'unchanged refresh':>27}")
+        for size in (5, 20, 100, 500):
+            payload = make_payload(f'bench{size}', size, size)
+            first, first_writes, first_time = count_statements(lambda: save_scraped_data(payload))
+            again, again_writes, again_time = count_statements(lambda: save_scraped_data(payload))
+            print(
+                f"{size:>6} {size:>9} | {first:>3} stmts {first_writes:>3} writes {first_time * 1000:>6.1f}ms"
+                f" | {again:>3} stmts {again_writes:>3} writes {again_time * 1000:>6.1f}ms"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Cost of serializing a page of /api/pages/ results.
+
+Compares the old path (ORM objects, to_dict, jsonify) with the
+columnar one (row tuples, RowSerializer, orjson) for a 50 row page,
+with all fields and with fields=name,follower_count: end to end
+(query included) and for the encoding step alone. In-memory SQLite
+makes the query itself cheap, so the end to end gap is smaller than
+against a networked MySQL.
+
+    python benchmarks/bench_serialize.py
+"""
+import os
+import sys
+import time
+
+from flask import jsonify
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.models import db, Page
+from app.serializers import page_serializer, json_response
+from benchmarks.bench_save import BenchConfig
+
+ROWS = 50
+ROUNDS = 200
+
+
+def seed():
+    db.session.add_all([
+        Page(
+            page_id=f'company{i}', name=f'Company {i}', url=f'https://www.linkedin.com/company/company{i}/',
+            description='A company that does things. ' * 20, website=f'https://company{i}.example.com',
+            industry='Software Development', follower_count=1000 * i, employee_count=10 * i,
+            specialities='Cloud,Data,Consulting,Security,AI', headquarters='Berlin, Germany',
+            founded_year=2000 + i % 20, company_type='Privately Held'
+        )
+        for i in range(ROWS)
+    ])
+    db.session.commit()
+
+
+def orm_to_dict():
+    pages = Page.query.order_by(Page.follower_count.desc()).limit(ROWS).all()
+    return jsonify({'status': 'success', 'message': 'Success', 'data': {'pages': [p.to_dict() for p in pages]}})
+
+
+def columnar(fields):
+    def run():
+        rows = Page.query.with_entities(*page_serializer.columns(fields)) \
+            .order_by(Page.follower_count.desc()).limit(ROWS).all()
+        return json_response({'pages': page_serializer.serialize(rows, fields)})
+    return run
+
+
+def timed(func):
+    func()
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        func()
+        # drop the identity map like a new request would
+        db.session.expunge_all()
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def report(label, elapsed, baseline):
+    print(f"  {label:<30} {elapsed * 1000:>7.3f}ms  {baseline / elapsed:>5.1f}x")
+
+
+def main():
+    app = create_app(BenchConfig)
+
+    with app.test_request_context():
+        db.create_all()
+        seed()
+
+        all_fields = page_serializer.parse_fields(None)
+        narrow = ['name', 'follower_count']
+
+        print(f"end to end, {ROWS} rows")
+        baseline = timed(orm_to_dict)
+        report('to_dict + jsonify', baseline, baseline)
+        report('columnar, all fields', timed(columnar(all_fields)), baseline)
+        report('columnar, name,follower_count', timed(columnar(narrow)), baseline)
+
+        print(f"encoding only, {ROWS} rows")
+        pages = Page.query.order_by(Page.follower_count.desc()).limit(ROWS).all()
+        baseline = timed(lambda: jsonify({'data': {'pages': [p.to_dict() for p in pages]}}))
+        report('to_dict + jsonify', baseline, baseline)
+
+        for label, fields in (('columnar, all fields', all_fields), ('columnar, name,follower_count', narrow)):
+            rows = Page.query.with_entities(*page_serializer.columns(fields)) \
+                .order_by(Page.follower_count.desc()).limit(ROWS).all()
+            report(label, timed(lambda: json_response({'pages': page_serializer.serialize(rows, fields)})), baseline)
+
+
+if __name__ == '__main__':
+    main()
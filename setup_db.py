@@ -36,6 +36,66 @@ def create_tables():
         print("All tables created successfully.")
 
 
+def upgrade_schema():
+    """Add columns and indexes the models define but existing tables are missing"""
+    from sqlalchemy import inspect, text
+    from app import create_app
+    from app.models import db
+    
+    app = create_app()
+    
+    with app.app_context():
+        inspector = inspect(db.engine)
+        
+        with db.engine.begin() as conn:
+            for table in db.metadata.sorted_tables:
+                if not inspector.has_table(table.name):
+                    continue
+                
+                existing = {c['name'] for c in inspector.get_columns(table.name)}
+                
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    column_type = column.type.compile(dialect=db.engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+                    print(f"Added column {table.name}.{column.name}")
+                
+                existing_indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+                
+                for index in table.indexes:
+                    if index.name in existing_indexes:
+                        continue
+                    index.create(bind=conn)
+                    print(f"Created index {index.name}")
+        
+        print("Schema is up to date.")
+
+
+def backfill_taxonomy():
+    """Link existing pages to the industry and speciality lookup tables"""
+    from app import create_app
+    from app.services.taxonomy import rebuild_taxonomy
+    
+    app = create_app()
+    
+    with app.app_context():
+        count = rebuild_taxonomy()
+        print(f"Linked {count} pages to industries and specialities.")
+
+
+def backfill_search_index():
+    """Index existing pages and posts for /api/search"""
+    from app import create_app
+    from app.services.search import rebuild_search_index
+    
+    app = create_app()
+    
+    with app.app_context():
+        count = rebuild_search_index()
+        print(f"Indexed {count} search terms.")
+
+
 if __name__ == '__main__':
     print("=" * 50)
     print("Setting up database...")
@@ -44,6 +104,9 @@ if __name__ == '__main__':
     try:
         create_database()
         create_tables()
+        upgrade_schema()
+        backfill_taxonomy()
+        backfill_search_index()
         print("=" * 50)
         print("Database setup complete!")
         print("=" * 50)
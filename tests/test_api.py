@@ -1,11 +1,13 @@
+import json
 import pytest
+import threading
 import sys
 import os
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app import create_app
-from app.models import db, Page, Post, User
+from app.models import db, Page, Post, User, SearchTerm
 
 
 class TestConfig:
@@ -64,6 +66,10 @@ def sample_page(app):
             )
             db.session.add(user)
 
+        # link the lookup tables as the save path (or setup_db's backfill) would
+        from app.services.taxonomy import sync_page_taxonomy
+        sync_page_taxonomy(page)
+
         db.session.commit()
         return page
 
@@ -166,4 +172,891 @@ def test_page_not_found_posts(client):
 
 def test_page_not_found_employees(client):
     response = client.get('/api/pages/nonexistent/employees')
-    assert response.status_code == 404
\ No newline at end of file
+    assert response.status_code == 404
+
+@pytest.fixture
+def fake_scrape(monkeypatch):
+    """Replace Selenium scraping with the scraper's own mock data"""
+    from app.services.scraper import LinkedInScraper
+
+    calls = []
+
+    def scrape_page(self, page_id, **kwargs):
+        calls.append(page_id)
+        return self._generate_mock_data(page_id)
+
+    monkeypatch.setattr(LinkedInScraper, 'scrape_page', scrape_page)
+    return calls
+
+
+@pytest.fixture
+def eager_jobs(app, monkeypatch):
+    from app.services.job_queue import job_queue
+    monkeypatch.setattr(job_queue, 'eager', True)
+    return job_queue
+
+
+def test_scrape_returns_job(client, fake_scrape, eager_jobs):
+    response = client.post('/api/pages/newcompany/scrape')
+    assert response.status_code == 202
+    data = response.get_json()['data']
+    assert data['page_id'] == 'newcompany'
+    assert data['status_url'] == f"/api/jobs/{data['job_id']}"
+
+    response = client.get(data['status_url'])
+    assert response.status_code == 200
+    job = response.get_json()['data']
+    assert job['status'] == 'completed'
+    assert job['progress'] == 'done'
+    assert job['result']['page_id'] == 'newcompany'
+    assert Page.query.filter_by(page_id='newcompany').first() is not None
+
+
+def test_scrape_job_failure_reported(client, eager_jobs, monkeypatch):
+    from app.services.scraper import LinkedInScraper
+    monkeypatch.setattr(LinkedInScraper, 'scrape_page', lambda self, page_id, **kwargs: None)
+
+    response = client.post('/api/pages/newcompany/scrape')
+    job_id = response.get_json()['data']['job_id']
+
+    job = client.get(f'/api/jobs/{job_id}').get_json()['data']
+    assert job['status'] == 'failed'
+    assert 'newcompany' in job['error']
+
+
+def test_scrape_job_runs_in_background(client, fake_scrape):
+    from app.services.job_queue import job_queue
+
+    response = client.post('/api/pages/newcompany/scrape')
+    assert response.status_code == 202
+    job = job_queue.get(response.get_json()['data']['job_id'])
+
+    job_queue.shutdown(wait=True)
+    assert job.status == 'completed'
+
+
+def test_job_not_found(client):
+    response = client.get('/api/jobs/doesnotexist')
+    assert response.status_code == 404
+
+
+def test_scrape_reuses_active_job(client, monkeypatch):
+    from app.services.scraper import LinkedInScraper
+    from app.services.job_queue import job_queue
+
+    release = threading.Event()
+    calls = []
+
+    def blocking_scrape(self, page_id, **kwargs):
+        calls.append(page_id)
+        release.wait(2)
+        return self._generate_mock_data(page_id)
+
+    monkeypatch.setattr(LinkedInScraper, 'scrape_page', blocking_scrape)
+
+    first = client.post('/api/pages/newcompany/scrape').get_json()['data']
+    second = client.post('/api/pages/newcompany/scrape')
+    assert second.status_code == 202
+    assert second.get_json()['data']['job_id'] == first['job_id']
+    assert second.get_json()['message'] == 'Scrape already in progress'
+
+    release.set()
+    job_queue.shutdown(wait=True)
+    assert calls == ['newcompany']
+
+
+def test_batch_scrape_streams_ndjson(client, fake_scrape):
+    response = client.post('/api/pages/batch-scrape', json={
+        'page_ids': ['alpha', 'beta', 'alpha'],
+        'concurrency': 1
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(line['page_id'] for line in lines) == ['alpha', 'beta']
+    assert all(line['status'] == 'ok' for line in lines)
+    assert sorted(fake_scrape) == ['alpha', 'beta']
+    assert Page.query.count() == 2
+
+
+def test_batch_scrape_rejects_invalid_ids(client, fake_scrape):
+    response = client.post('/api/pages/batch-scrape', json={'page_ids': ['good', 'bad id!']})
+    assert response.status_code == 400
+    assert 'bad id!' in response.get_json()['message']
+
+    response = client.post('/api/pages/batch-scrape', json={'page_ids': []})
+    assert response.status_code == 400
+
+    for concurrency in (True, 0, -1, None, '2', 1.5):
+        response = client.post('/api/pages/batch-scrape', json={'page_ids': ['good'], 'concurrency': concurrency})
+        assert response.status_code == 400, concurrency
+        assert 'concurrency' in response.get_json()['message']
+    assert fake_scrape == []
+
+
+@pytest.fixture
+def fixed_scrape(monkeypatch):
+    """Scraper that returns the same payload every time"""
+    from app.services.scraper import LinkedInScraper
+    from benchmarks.bench_save import make_payload
+
+    payload = make_payload('steadyco', 3, 2)
+
+    monkeypatch.setattr(LinkedInScraper, 'scrape_page', lambda self, page_id, **kwargs: payload)
+    return payload
+
+
+def test_force_refresh_unchanged_keeps_cache(app, client, fixed_scrape):
+    import time
+    app.config['PAGE_CACHE_STALE_TIMEOUT'] = 60
+    response = client.get('/api/pages/steadyco')
+    assert response.get_json()['message'] == 'Scraped and saved successfully'
+
+    from app.services.cache_service import get_cached_page_entry, set_cached_page
+    cached, stale_age = get_cached_page_entry('steadyco')
+    # stand-in for anything the entry holds; an unchanged scrape must not rebuild it
+    set_cached_page('steadyco', dict(cached, description='cached copy'), timeout=0.05)
+    time.sleep(0.1)
+    assert get_cached_page_entry('steadyco')[1] > 0
+
+    response = client.get('/api/pages/steadyco?force_refresh=true')
+    assert response.status_code == 200
+    assert response.get_json()['message'] == 'Page unchanged since last scrape'
+    assert response.get_json()['data']['name'] == 'Steadyco'
+
+    kept, stale_age = get_cached_page_entry('steadyco')
+    assert kept['description'] == 'cached copy'
+    assert stale_age == 0
+    assert kept['last_checked_at'] > cached['last_checked_at']
+
+
+def _walk_cursor(client, url, key):
+    seen = []
+    cursor = ''
+    while True:
+        separator = '&' if '?' in url else '?'
+        data = client.get(f'{url}{separator}cursor={cursor}').get_json()['data']
+        assert 'total_items' not in data['pagination']
+        seen.extend(data[key])
+        if not data['pagination']['has_next']:
+            assert data['pagination']['next_cursor'] is None
+            return seen
+        cursor = data['pagination']['next_cursor']
+
+
+def test_cursor_pagination_pages(client, app):
+    for i, followers in enumerate([500, 100, 100, 100, 0, 300, 0]):
+        db.session.add(Page(page_id=f'company{i}', name=f'Company {i}', follower_count=followers))
+    db.session.commit()
+
+    pages = _walk_cursor(client, '/api/pages/?per_page=2', 'pages')
+    assert len(pages) == 7
+    assert len(set(p['page_id'] for p in pages)) == 7
+
+    assert [p['follower_count'] for p in pages] == [500, 300, 100, 100, 100, 0, 0]
+
+
+def test_cursor_pagination_posts(client, sample_page):
+    # sample posts have no posted_at, so this walks the NULL tail of the sort
+    posts = _walk_cursor(client, '/api/pages/testcompany/posts?per_page=2', 'posts')
+    assert len(posts) == 5
+    assert len(set(p['id'] for p in posts)) == 5
+
+    employees = _walk_cursor(client, '/api/pages/testcompany/employees?per_page=2', 'employees')
+    assert [e['full_name'] for e in employees] == [f'Test Employee {i}' for i in range(3)]
+
+
+def test_invalid_cursor(client, sample_page):
+    response = client.get('/api/pages/?cursor=not-a-cursor')
+    assert response.status_code == 400
+    response = client.get('/api/pages/testcompany/posts?cursor=bm9wZQ')
+    assert response.status_code == 400
+
+    # well-formed JSON with keys of the wrong type
+    import base64
+    import json
+    for crafted in ([[1], 1], [{'a': 1}, 1], [{'dt': 5}, 1], [True, 1], [1, True], [1, '2']):
+        cursor = base64.urlsafe_b64encode(json.dumps(crafted).encode()).decode().rstrip('=')
+        assert client.get(f'/api/pages/?cursor={cursor}').status_code == 400
+        assert client.get(f'/api/pages/testcompany/posts?cursor={cursor}').status_code == 400
+
+
+def test_cursor_pagination_mixed_posted_at(client, sample_page):
+    from datetime import datetime, timedelta
+
+    page = Page.query.filter_by(page_id='testcompany').first()
+    now = datetime(2024, 1, 1)
+    for i in range(4):
+        db.session.add(Post(page_id=page.id, linkedin_post_id=f'dated_{i}', posted_at=now - timedelta(days=i % 2)))
+    db.session.commit()
+
+    posts = _walk_cursor(client, '/api/pages/testcompany/posts?per_page=3', 'posts')
+    assert len(posts) == 9
+    assert len(set(p['id'] for p in posts)) == 9
+    assert [p['posted_at'] is None for p in posts] == [False] * 4 + [True] * 5
+
+
+@pytest.fixture
+def queries(app):
+    """Records the SQL statements executed while the test runs"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def test_listing_is_cached(client, sample_page, queries):
+    first = client.get('/api/pages/?industry=Technology').get_json()
+    assert any('count(' in q.lower() for q in queries)
+
+    del queries[:]
+    second = client.get('/api/pages/?industry=technology%20').get_json()
+    assert queries == []
+    assert second['data'] == first['data']
+
+    # another page of the same filters reuses the cached total
+    del queries[:]
+    client.get('/api/pages/?industry=Technology&page=2')
+    assert queries and not any('count(' in q.lower() for q in queries)
+
+
+def test_listing_cache_invalidated_on_save(client, sample_page):
+    from app.services.persistence import save_scraped_data
+
+    data = client.get('/api/pages/').get_json()['data']
+    assert data['pagination']['total_items'] == 1
+
+    save_scraped_data({'page_id': 'newcompany', 'name': 'New Company', 'follower_count': 99999})
+
+    data = client.get('/api/pages/').get_json()['data']
+    assert data['pagination']['total_items'] == 2
+    assert data['pages'][0]['page_id'] == 'newcompany'
+
+
+def test_page_variants_share_cached_parts(client, sample_page, queries):
+    light = client.get('/api/pages/testcompany').get_json()
+    assert light['message'] == 'Retrieved from database'
+    assert 'posts' not in light['data']
+
+    # a heavy request after a light one gets its slices, not the light body
+    heavy = client.get('/api/pages/testcompany?include_posts=true').get_json()
+    assert heavy['message'] == 'Retrieved from database'
+    assert len(heavy['data']['posts']) == 5
+    assert 'employees' not in heavy['data']
+
+    del queries[:]
+    both = client.get('/api/pages/testcompany?include_posts=true&include_employees=true').get_json()
+    assert len(both['data']['employees']) == 3
+    # only the employees slice was missing
+    assert len(queries) == 1
+
+    del queries[:]
+    light = client.get('/api/pages/testcompany').get_json()
+    assert light['message'] == 'Retrieved from cache'
+    assert 'posts' not in light['data'] and 'employees' not in light['data']
+    heavy = client.get('/api/pages/testcompany?include_posts=true&include_employees=true').get_json()
+    assert heavy['message'] == 'Retrieved from cache'
+    assert heavy['data'] == both['data']
+    assert queries == []
+
+
+def test_page_slice_invalidated_alone(client, sample_page, queries):
+    from app.services.cache_service import clear_page_slice
+
+    client.get('/api/pages/testcompany?include_posts=true&include_employees=true')
+    clear_page_slice('testcompany', 'posts')
+
+    del queries[:]
+    data = client.get('/api/pages/testcompany?include_posts=true&include_employees=true').get_json()
+    assert data['message'] == 'Retrieved from database'
+    assert len(data['data']['posts']) == 5
+    assert len(queries) == 1 and 'posts' in queries[0]
+
+
+def test_save_writes_page_through_to_cache(client, fixed_scrape, queries):
+    from app.services.persistence import save_scraped_data
+    from app.signals import page_saved
+
+    client.get('/api/pages/steadyco?include_posts=true&include_employees=true')
+
+    received = []
+
+    def on_saved(sender, page, changes, **kwargs):
+        received.append(changes)
+
+    page_saved.connect(on_saved)
+    try:
+        payload = dict(fixed_scrape, follower_count=fixed_scrape['follower_count'] + 1)
+        payload['posts'] = fixed_scrape['posts'][:2]
+        save_scraped_data(payload)
+    finally:
+        page_saved.disconnect(on_saved)
+
+    assert received and received[0]['posts']['retired'] == 1
+
+    # every variant is already fresh, with no database reads
+    del queries[:]
+    data = client.get('/api/pages/steadyco?include_posts=true&include_employees=true').get_json()
+    assert data['message'] == 'Retrieved from cache'
+    assert data['data']['follower_count'] == fixed_scrape['follower_count'] + 1
+    assert len(data['data']['posts']) == 2
+    assert queries == []
+
+
+@pytest.fixture
+def eager_refresh(app, monkeypatch):
+    from app.services.job_queue import refresh_queue
+    monkeypatch.setattr(refresh_queue, 'eager', True)
+    return refresh_queue
+
+
+def test_stale_page_served_while_refreshing(app, client, sample_page, eager_refresh):
+    import time
+
+    app.config.update(PAGE_CACHE_TIMEOUT=0.1, PAGE_CACHE_STALE_TIMEOUT=60)
+
+    first = client.get('/api/pages/testcompany').get_json()
+    assert first['meta']['source'] == 'database'
+    assert first['meta']['revalidating'] == []
+
+    Page.query.filter_by(page_id='testcompany').update({'name': 'Renamed Company'})
+    db.session.commit()
+    time.sleep(0.15)
+
+    stale = client.get('/api/pages/testcompany').get_json()
+    assert stale['message'] == 'Retrieved from cache'
+    assert stale['data']['name'] == 'Test Company'
+    assert stale['meta']['stale_age'] > 0
+    assert stale['meta']['revalidating'] == ['cache']
+
+    fresh = client.get('/api/pages/testcompany').get_json()
+    assert fresh['message'] == 'Retrieved from cache'
+    assert fresh['data']['name'] == 'Renamed Company'
+    assert fresh['meta']['stale_age'] == 0
+    assert fresh['meta']['revalidating'] == []
+
+
+def test_old_page_rescraped_in_background(app, client, sample_page, fake_scrape, eager_jobs):
+    from datetime import datetime, timedelta
+
+    app.config['PAGE_FRESHNESS_WINDOW'] = 3600
+    Page.query.filter_by(page_id='testcompany').update(
+        {'last_checked_at': datetime.utcnow() - timedelta(hours=2)}
+    )
+    db.session.commit()
+
+    data = client.get('/api/pages/testcompany').get_json()
+    assert data['message'] == 'Retrieved from database'
+    assert data['meta']['refresh_age'] >= 7200
+    assert data['meta']['revalidating'] == ['scrape']
+    assert fake_scrape == ['testcompany']
+
+    data = client.get('/api/pages/testcompany').get_json()
+    assert data['meta']['refresh_age'] < 60
+    assert data['meta']['revalidating'] == []
+    assert fake_scrape == ['testcompany']
+
+
+def test_page_stats_follow_saves(client, app):
+    from datetime import datetime, timedelta
+    from app.services.persistence import save_scraped_data
+
+    now = datetime(2024, 3, 1)
+    posts = [
+        {'linkedin_post_id': f'p{i}', 'content': f'Post {i}', 'like_count': 10 * i,
+         'comment_count': i, 'share_count': 1, 'posted_at': now - timedelta(days=7 * i)}
+        for i in range(5)
+    ]
+    save_scraped_data({'page_id': 'statsco', 'name': 'Stats Co', 'follower_count': 1000, 'posts': posts})
+
+    stats = client.get('/api/pages/statsco/stats').get_json()['data']['stats']
+    assert stats['post_count'] == 5
+    assert stats['total_likes'] == 100
+    assert stats['avg_comments'] == 2
+    assert stats['engagement_rate'] == pytest.approx((100 + 10 + 5) / 5 / 1000)
+    assert stats['posts_per_week'] == pytest.approx(5 / 4)
+    assert stats['top_post_ids'] == ['p4', 'p3', 'p2', 'p1', 'p0']
+
+    # a refresh that drops a post updates the row in place
+    save_scraped_data({'page_id': 'statsco', 'name': 'Stats Co', 'follower_count': 1000, 'posts': posts[:3]})
+    stats = client.get('/api/pages/statsco/stats').get_json()['data']['stats']
+    assert stats['post_count'] == 3
+    assert stats['total_likes'] == 30
+    assert stats['top_post_ids'] == ['p2', 'p1', 'p0']
+
+    summary = client.get('/api/pages/statsco/summary').get_json()['data']['summary']
+    assert 'Across 3 recent posts they average 10 likes' in summary['summary']['engagement']
+
+
+def test_page_stats_built_for_existing_page(client, sample_page):
+    stats = client.get('/api/pages/testcompany/stats').get_json()['data']['stats']
+    assert stats['post_count'] == 5
+    assert stats['total_likes'] == 600
+
+    response = client.get('/api/pages/missing/stats')
+    assert response.status_code == 404
+
+
+def test_page_analytics_buckets(client, app, queries):
+    from datetime import datetime, timedelta
+    from app.services.persistence import save_scraped_data
+
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    posts = [
+        {'linkedin_post_id': 'a', 'like_count': 10, 'comment_count': 1, 'share_count': 0, 'posted_at': today},
+        {'linkedin_post_id': 'b', 'like_count': 5, 'comment_count': 2, 'share_count': 1, 'posted_at': today},
+        {'linkedin_post_id': 'c', 'like_count': 7, 'comment_count': 0, 'share_count': 2,
+         'posted_at': today - timedelta(days=14)},
+        {'linkedin_post_id': 'old', 'like_count': 99, 'posted_at': today - timedelta(days=200)}
+    ]
+    save_scraped_data({'page_id': 'chartco', 'name': 'Chart Co', 'posts': posts})
+
+    data = client.get('/api/pages/chartco/analytics?days=30').get_json()['data']
+    assert data['window']['days'] == 30
+    assert [d['date'] for d in data['daily']] == [
+        (today - timedelta(days=14)).date().isoformat(), today.date().isoformat()
+    ]
+    assert data['daily'][1] == {'date': today.date().isoformat(), 'posts': 2, 'likes': 15, 'comments': 3, 'shares': 1}
+    assert sum(w['posts'] for w in data['weekly']) == 3
+    assert len(data['weekly']) == 2
+    assert all(datetime.fromisoformat(w['week_start']).weekday() == 0 for w in data['weekly'])
+
+    del queries[:]
+    cached = client.get('/api/pages/chartco/analytics?days=30').get_json()
+    assert cached['message'] == 'Retrieved from cache'
+    assert len(queries) == 1  # the page lookup
+
+    # retiring a post invalidates every window of the page
+    save_scraped_data({'page_id': 'chartco', 'name': 'Chart Co', 'posts': posts[1:]})
+    data = client.get('/api/pages/chartco/analytics?days=30').get_json()['data']
+    assert data['daily'][1]['posts'] == 1
+
+    assert client.get('/api/pages/chartco/analytics?days=0').status_code == 400
+    assert client.get('/api/pages/missing/analytics').status_code == 404
+
+
+@pytest.fixture
+def ranked_pages(app, eager_refresh):
+    from app.services.persistence import save_scraped_data
+
+    for name, industry, followers, likes in [
+        ('alpha', 'Software', 5000, 10), ('beta', 'software ', 9000, 1),
+        ('gamma', 'Retail', 7000, 50), ('delta', None, 100, 0)
+    ]:
+        save_scraped_data({
+            'page_id': name, 'name': name.title(), 'industry': industry, 'follower_count': followers,
+            'posts': [{'linkedin_post_id': f'{name}_post', 'like_count': likes}]
+        })
+
+
+def test_leaderboard_top_pages(client, ranked_pages):
+    data = client.get('/api/leaderboards?metric=follower_count').get_json()['data']
+    assert [p['page_id'] for p in data['pages']] == ['beta', 'gamma', 'alpha', 'delta']
+    assert [p['rank'] for p in data['pages']] == [1, 2, 3, 4]
+    assert data['built_at'] is not None
+
+    data = client.get('/api/leaderboards?metric=engagement_rate&industry=Software&limit=1').get_json()['data']
+    assert data['industry'] == 'software'
+    assert [p['page_id'] for p in data['pages']] == ['alpha']
+
+    assert client.get('/api/leaderboards?metric=nope').status_code == 400
+
+
+def test_page_rank_lookup(client, ranked_pages):
+    data = client.get('/api/leaderboards/pages/alpha').get_json()['data']
+    assert data['ranks']['follower_count'] == {'score': 5000, 'rank': 3, 'industry_rank': 2}
+    assert data['ranks']['engagement_rate']['industry_rank'] == 1
+
+    data = client.get('/api/leaderboards/pages/delta').get_json()['data']
+    assert data['ranks']['follower_count']['industry_rank'] is None
+    assert client.get('/api/leaderboards/pages/missing').status_code == 404
+
+
+def test_leaderboards_rebuilt_when_old(app, client, ranked_pages, monkeypatch):
+    from app.services.persistence import save_scraped_data
+    from app.services.job_queue import refresh_queue
+    from app.services.rankings import REBUILD_LOCK_KEY
+    from app.services.single_flight import acquire_db_lock, release_db_lock
+
+    client.get('/api/leaderboards')
+    save_scraped_data({'page_id': 'omega', 'name': 'Omega', 'follower_count': 99999})
+
+    # still within LEADERBOARD_MAX_AGE
+    data = client.get('/api/leaderboards').get_json()['data']
+    assert 'omega' not in [p['page_id'] for p in data['pages']]
+
+    result = app.test_cli_runner().invoke(args=['rebuild-rankings'])
+    assert 'Rebuilt leaderboards with' in result.output
+    data = client.get('/api/leaderboards').get_json()['data']
+    assert data['pages'][0]['page_id'] == 'omega'
+
+    # once too old, the old board is served while one rebuild is queued
+    save_scraped_data({'page_id': 'zeta', 'name': 'Zeta', 'follower_count': 123456})
+    app.config['LEADERBOARD_MAX_AGE'] = 0
+    queued = []
+    monkeypatch.setattr(refresh_queue, 'submit', lambda key, func: queued.append(func))
+    for _ in range(3):
+        data = client.get('/api/leaderboards').get_json()['data']
+        assert data['pages'][0]['page_id'] == 'omega'
+    assert len(queued) == 1
+
+    # another process holding the rebuild lock makes this one skip
+    assert acquire_db_lock(REBUILD_LOCK_KEY, 'other-process')
+    assert queued[0](None) == {'skipped': 'rebuild already running'}
+    release_db_lock(REBUILD_LOCK_KEY, 'other-process')
+
+    assert queued[0](None)['rows'] > 0
+    data = client.get('/api/leaderboards').get_json()['data']
+    assert data['pages'][0]['page_id'] == 'zeta'
+
+
+def test_leaderboards_not_rebuilt_per_request_when_empty(client, eager_refresh, monkeypatch):
+    from app.services import rankings
+
+    calls = []
+    monkeypatch.setattr(rankings, 'rebuild_rankings', lambda: calls.append(1) or 0)
+    for _ in range(3):
+        assert client.get('/api/leaderboards').get_json()['data']['pages'] == []
+    assert calls == [1]
+
+
+@pytest.fixture
+def searchable_pages(app):
+    from app.services.persistence import save_scraped_data
+
+    save_scraped_data({
+        'page_id': 'rocketco', 'name': 'Rocket Launchers', 'specialities': 'Aerospace,Propulsion',
+        'description': 'We build rockets.',
+        'posts': [
+            {'linkedin_post_id': 'r1', 'content': 'Our new rocket engine passed its test fire'},
+            {'linkedin_post_id': 'r2', 'content': 'Hiring propulsion engineers'}
+        ]
+    })
+    save_scraped_data({
+        'page_id': 'bakery', 'name': 'Rocket Bakery', 'description': 'Bread and pastries.',
+        'posts': [{'linkedin_post_id': 'b1', 'content': 'Fresh sourdough every morning'}]
+    })
+
+
+def test_search_ranks_pages_and_posts(client, searchable_pages):
+    data = client.get('/api/search?q=rocket').get_json()['data']
+    results = data['results']
+    assert [r['type'] for r in results[:2]] == ['page', 'page']
+    # the name and description both say rocket, so rocketco leads
+    assert results[0]['page_id'] == 'rocketco'
+    assert any(r['type'] == 'post' and r['linkedin_post_id'] == 'r1' for r in results)
+
+    data = client.get('/api/search?q=propul&type=post').get_json()['data']
+    assert [r['linkedin_post_id'] for r in data['results']] == ['r2']
+
+    # every word must match
+    data = client.get('/api/search?q=rocket+sourdough').get_json()['data']
+    assert data['results'] == []
+    data = client.get('/api/search?q=rocket bak').get_json()['data']
+    assert [r['page_id'] for r in data['results']] == ['bakery']
+
+    assert client.get('/api/search?q=').status_code == 400
+    assert client.get('/api/search?q=rocket&type=user').status_code == 400
+
+
+def test_search_index_follows_saves(app, client, searchable_pages, sample_page):
+    from app.services.persistence import save_scraped_data
+
+    save_scraped_data({
+        'page_id': 'bakery', 'name': 'Rocket Bakery', 'description': 'Bread and pastries.',
+        'posts': [{'linkedin_post_id': 'b2', 'content': 'Croissants today'}]
+    })
+    assert client.get('/api/search?q=sourdough').get_json()['data']['results'] == []
+    assert len(client.get('/api/search?q=croissant').get_json()['data']['results']) == 1
+
+    # pages stored outside the save path are picked up by a rebuild
+    assert client.get('/api/search?q=testing').get_json()['data']['results'] == []
+    result = app.test_cli_runner().invoke(args=['rebuild-search-index'])
+    assert 'Indexed' in result.output
+    results = client.get('/api/search?q=testing').get_json()['data']['results']
+    assert results[0]['page_id'] == 'testcompany'
+
+
+def test_search_prefixes_only_last_word(client, searchable_pages, queries):
+    del queries[:]
+    data = client.get('/api/search?q=rocket launch&limit=5').get_json()['data']
+    assert [r['page_id'] for r in data['results']] == ['rocketco']
+    # matched, intersected and ranked in one query
+    search_queries = [q for q in queries if 'search_terms' in q]
+    assert len(search_queries) == 1 and 'LIMIT' in search_queries[0]
+
+    assert client.get('/api/search?q=rock launchers').get_json()['data']['results'] == []
+
+
+def test_engagement_updates_skip_reindex(app, searchable_pages, queries):
+    from app.services.persistence import persist_scraped_data
+
+    payload = {
+        'page_id': 'rocketco', 'name': 'Rocket Launchers', 'specialities': 'Aerospace,Propulsion',
+        'description': 'We build rockets.',
+        'posts': [
+            {'linkedin_post_id': 'r1', 'content': 'Our new rocket engine passed its test fire', 'like_count': 50},
+            {'linkedin_post_id': 'r2', 'content': 'Hiring propulsion engineers', 'like_count': 7}
+        ]
+    }
+    del queries[:]
+    persist_scraped_data(payload)
+    assert not any('search_terms' in q for q in queries if not q.lstrip().startswith('SELECT'))
+
+    # an edited post is re-indexed on its own
+    payload['posts'][1]['content'] = 'Hiring avionics engineers'
+    del queries[:]
+    persist_scraped_data(payload)
+    deletes = [q for q in queries if q.startswith('DELETE FROM search_terms')]
+    assert len(deletes) == 1 and 'doc_type' in deletes[0]
+    r1 = Post.query.filter_by(linkedin_post_id='r1').first()
+    assert SearchTerm.query.filter_by(doc_type='post', doc_id=r1.id).count() > 0
+    assert SearchTerm.query.filter_by(term='propulsion', doc_type='post').count() == 0
+    assert SearchTerm.query.filter_by(term='avionics').count() == 1
+
+
+def test_facets_counts(client, sample_page, queries):
+    from app.services.persistence import save_scraped_data
+
+    save_scraped_data({'page_id': 'techtwo', 'name': 'Tech Two', 'industry': 'technology ',
+                       'specialities': 'QA, Cloud,qa'})
+    save_scraped_data({'page_id': 'shop', 'name': 'Shop', 'industry': 'Retail'})
+
+    data = client.get('/api/facets').get_json()['data']
+    assert data['industries'] == [{'name': 'Technology', 'count': 2}, {'name': 'Retail', 'count': 1}]
+    specialities = dict((f['name'], f['count']) for f in data['specialities'])
+    assert specialities == {'QA': 2, 'Testing': 1, 'Development': 1, 'Cloud': 1}
+
+    del queries[:]
+    assert client.get('/api/facets').get_json()['message'] == 'Retrieved from cache'
+    assert queries == []
+
+    # changing an industry invalidates the counts and moves the page between filters
+    save_scraped_data({'page_id': 'shop', 'name': 'Shop', 'industry': 'Technology'})
+    data = client.get('/api/facets').get_json()['data']
+    assert data['industries'] == [{'name': 'Technology', 'count': 3}]
+
+    pages = client.get('/api/pages/?industry=techno').get_json()['data']['pages']
+    assert sorted(p['page_id'] for p in pages) == ['shop', 'techtwo', 'testcompany']
+
+
+def test_posts_with_comments_query_count_is_constant(client, app, queries):
+    from app.models import Comment
+    from app.services.persistence import save_scraped_data
+
+    def counted(url):
+        del queries[:]
+        data = client.get(url).get_json()['data']
+        return data, len(queries)
+
+    posts = [
+        {'linkedin_post_id': f'p{i}', 'content': f'Post {i}',
+         'comments': [{'author_name': f'Reader {j}', 'content': f'Comment {j}'} for j in range(12)]}
+        for i in range(25)
+    ]
+    save_scraped_data({'page_id': 'chatty', 'name': 'Chatty', 'posts': posts})
+
+    small, small_count = counted('/api/pages/chatty/posts?per_page=2&include_comments=true')
+    large, large_count = counted('/api/pages/chatty/posts?per_page=25&include_comments=true')
+
+    assert small_count == large_count
+    assert len(large['posts']) == 25
+    assert all(len(p['comments']) == 10 for p in large['posts'])
+    first = large['posts'][0]
+    expected = Comment.query.filter_by(post_id=first['id']).order_by(Comment.id).limit(10).all()
+    assert first['comments'] == [c.to_dict() for c in expected]
+
+    plain, plain_count = counted('/api/pages/chatty/posts?per_page=25')
+    assert 'comments' not in plain['posts'][0]
+    assert plain_count == large_count - 1
+
+
+def test_page_detail_loads_in_two_queries(client, sample_page, queries):
+    from app.services.page_loader import load_page_parts
+
+    page = Page.query.filter_by(page_id='testcompany').first()
+    expected = page.to_dict(include_posts=True, include_employees=True)
+
+    del queries[:]
+    data = client.get('/api/pages/testcompany?include_posts=true&include_employees=true').get_json()['data']
+    assert len(queries) == 2
+    assert data == expected
+
+    del queries[:]
+    base, posts, employees = load_page_parts('testcompany', include_posts=True)
+    assert len(queries) == 1
+    assert len(posts) == 5 and employees is None
+
+    # a page without posts still comes back from the joined query
+    db.session.add(Page(page_id='quiet', name='Quiet'))
+    db.session.commit()
+    base, posts, employees = load_page_parts('quiet', include_posts=True, include_employees=True)
+    assert base['name'] == 'Quiet' and posts == [] and employees == []
+
+    assert load_page_parts('missing', include_posts=True) == (None, None, None)
+
+
+def test_pages_listing_matches_to_dict(client, sample_page):
+    page = Page.query.filter_by(page_id='testcompany').first()
+    data = client.get('/api/pages/').get_json()['data']
+    assert data['pages'] == [page.to_dict()]
+
+
+def test_pages_listing_fields(client, sample_page):
+    data = client.get('/api/pages/?fields=name,follower_count').get_json()['data']
+    assert data['pages'] == [{'name': 'Test Company', 'follower_count': 25000}]
+
+    # cursors still work when the sort columns are not returned
+    data = client.get('/api/pages/?fields=name&cursor=').get_json()['data']
+    assert data['pages'] == [{'name': 'Test Company'}]
+
+    response = client.get('/api/pages/?fields=name,password')
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['message']
+
+    for raw in (',', '%20', ' , '):
+        assert client.get(f'/api/pages/?fields={raw}').status_code == 400
+
+
+def test_fields_on_page_children(client, sample_page, queries):
+    data = client.get('/api/pages/testcompany/posts?fields=like_count,comment_count&include_comments=true').get_json()
+    posts = data['data']['posts']
+    assert len(posts) == 5
+    assert all(set(p) == {'like_count', 'comment_count', 'comments'} for p in posts)
+    assert data['data']['page_name'] == 'Test Company'
+
+    del queries[:]
+    employees = client.get('/api/pages/testcompany/employees?fields=full_name').get_json()['data']['employees']
+    assert employees == [{'full_name': f'Test Employee {i}'} for i in range(3)]
+    # neither the page's description nor unrequested user columns are read
+    assert not any('description' in q or 'profile_picture' in q for q in queries)
+
+    user = User.query.first()
+    page = Page.query.filter_by(page_id='testcompany').first()
+    page.followers.append(user)
+    db.session.commit()
+    followers = client.get('/api/pages/testcompany/followers?fields=id,headline').get_json()['data']['followers']
+    assert followers == [{'id': user.id, 'headline': 'Software Engineer'}]
+    followers = client.get('/api/pages/testcompany/followers').get_json()['data']['followers']
+    assert followers == [user.to_dict()]
+
+    for url in ('/posts?fields=nope', '/employees?fields=content', '/followers?fields=name'):
+        assert client.get(f'/api/pages/testcompany{url}').status_code == 400
+
+
+def test_fields_on_page_detail(client, sample_page, queries):
+    del queries[:]
+    data = client.get('/api/pages/testcompany?fields=name,follower_count&include_posts=true').get_json()['data']
+    assert set(data) == {'name', 'follower_count', 'posts'}
+    assert len(data['posts']) == 5
+    assert len(queries) == 1 and 'description' not in queries[0]
+
+    # a projected read does not cache a partial page
+    full = client.get('/api/pages/testcompany').get_json()
+    assert full['message'] == 'Retrieved from database'
+    assert 'description' in full['data']
+
+    # once cached, projections are cut from the cached page
+    del queries[:]
+    data = client.get('/api/pages/testcompany?fields=name').get_json()
+    assert data['message'] == 'Retrieved from cache'
+    assert data['data'] == {'name': 'Test Company'}
+    assert queries == []
+
+    assert client.get('/api/pages/testcompany?fields=name,secret').status_code == 400
+
+
+def test_export_ndjson(app, client, sample_page, queries):
+    import json
+
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    page = Page.query.filter_by(page_id='testcompany').first()
+    user = User.query.first()
+    page.followers.append(user)
+    db.session.commit()
+
+    del queries[:]
+    response = client.get('/api/export/pages.ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [json.loads(json.dumps(page.to_dict()))]
+    assert not any('count(' in q.lower() for q in queries)
+
+    body = client.get('/api/export/posts.ndjson?fields=linkedin_post_id').get_data(as_text=True)
+    lines = [json.loads(line) for line in body.splitlines()]
+    assert lines == [{'linkedin_post_id': f'post_{i}', 'page_id': 'testcompany'} for i in range(5)]
+
+    body = client.get('/api/export/employees.ndjson?fields=full_name&page_id=testcompany').get_data(as_text=True)
+    assert [json.loads(line)['full_name'] for line in body.splitlines()] == [f'Test Employee {i}' for i in range(3)]
+    assert client.get('/api/export/employees.ndjson?page_id=other').get_data() == b''
+
+    body = client.get('/api/export/followers.ndjson?fields=id').get_data(as_text=True)
+    assert [json.loads(line) for line in body.splitlines()] == [{'id': user.id, 'page_id': 'testcompany'}]
+
+    assert client.get('/api/export/pages.ndjson?fields=nope').status_code == 400
+    assert client.get('/api/export/posts.ndjson?fields=,').status_code == 400
+    assert client.get('/api/export/posts.ndjson?page_id=bad id!').status_code == 400
+
+
+def test_generations_outlive_default_timeout(client, sample_page, monkeypatch):
+    import time
+    import cachelib.simple
+    from app.services.cache_service import cache, get_generation, bump_generation
+    from app.services.persistence import save_scraped_data
+
+    assert client.get('/api/pages/').get_json()['data']['pagination']['total_items'] == 1
+    save_scraped_data({'page_id': 'newcompany', 'name': 'New Company', 'follower_count': 99999})
+    assert client.get('/api/pages/').get_json()['data']['pagination']['total_items'] == 2
+
+    # past CACHE_DEFAULT_TIMEOUT, but within the cached total's own TTL
+    later = time.time() + 301
+    monkeypatch.setattr(cachelib.simple, 'time', lambda: later)
+    assert client.get('/api/pages/').get_json()['data']['pagination']['total_items'] == 2
+
+    # an evicted counter comes back as a new generation, not the first one
+    generation = get_generation('facets')
+    bump_generation('facets')
+    cache.delete('gen_facets')
+    assert get_generation('facets') not in (generation, generation + 1)
+
+
+def test_scrape_pool_timeout_returns_503(client, monkeypatch):
+    from app.services.scraper import LinkedInScraper
+    from app.services.driver_pool import DriverPoolTimeout
+
+    def busy(self, page_id, **kwargs):
+        raise DriverPoolTimeout('No browser free after 120s')
+
+    monkeypatch.setattr(LinkedInScraper, 'scrape_page', busy)
+    response = client.get('/api/pages/newcompany')
+    assert response.status_code == 503
+    assert Page.query.filter_by(page_id='newcompany').first() is None
+
+
+def test_scrape_follower_rereads_in_new_transaction(client, monkeypatch):
+    from app.services.single_flight import scrape_flight
+
+    events = []
+
+    def follower(key, func):
+        # another caller did the scrape and committed
+        events.append('waited')
+        return None
+
+    real_rollback = db.session.rollback
+
+    def rollback():
+        events.append('rollback')
+        real_rollback()
+
+    monkeypatch.setattr(scrape_flight, 'do', follower)
+    monkeypatch.setattr(db.session, 'rollback', rollback)
+    client.get('/api/pages/newcompany')
+    assert events[:2] == ['waited', 'rollback']
@@ -0,0 +1,678 @@
+import sys
+import os
+import threading
+import time
+
+import pytest
+from flask_caching.backends.simplecache import SimpleCache
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.driver_pool import DriverPool, DriverPoolTimeout
+from app.services.scraper import LinkedInScraper
+
+
+class FakeDriver:
+    """Stands in for a selenium WebDriver"""
+
+    created = 0
+
+    def __init__(self):
+        FakeDriver.created += 1
+        self.alive = True
+        self.quit_called = False
+        self.visited = []
+        self.page_source = '<html><body><h1>Fake Co</h1></body></html>'
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise RuntimeError('session deleted because of page crash')
+        return self.visited[-1] if self.visited else 'data:,'
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def execute_script(self, script):
+        return None
+
+    def find_element(self, *args):
+        return object()
+
+    def quit(self):
+        self.quit_called = True
+        self.alive = False
+
+
+@pytest.fixture
+def pool():
+    FakeDriver.created = 0
+    return DriverPool(factory=FakeDriver, size=2, max_uses=3, acquire_timeout=1)
+
+
+def test_pool_reuses_drivers(pool):
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is second
+    assert FakeDriver.created == 1
+
+
+def test_pool_recycles_after_max_uses(pool):
+    drivers = []
+    for _ in range(4):
+        with pool.lease() as driver:
+            drivers.append(driver)
+    assert drivers[0] is drivers[2]
+    assert drivers[0].quit_called
+    assert drivers[3] is not drivers[0]
+    assert FakeDriver.created == 2
+
+
+def test_pool_discards_crashed_driver(pool):
+    with pytest.raises(ValueError):
+        with pool.lease() as crashed:
+            raise ValueError('boom')
+    assert crashed.quit_called
+
+    with pool.lease() as driver:
+        assert driver is not crashed
+
+
+def test_pool_health_check_replaces_dead_driver(pool):
+    with pool.lease() as driver:
+        pass
+    driver.alive = False
+
+    with pool.lease() as replacement:
+        assert replacement is not driver
+    assert driver.quit_called
+
+
+def test_pool_is_bounded(pool):
+    first = pool.acquire()
+    second = pool.acquire()
+    with pytest.raises(DriverPoolTimeout):
+        pool.acquire(timeout=0.05)
+
+    released = threading.Event()
+
+    def waiter():
+        with pool.lease():
+            released.set()
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    pool.release(first)
+    thread.join(timeout=1)
+    assert released.is_set()
+    pool.release(second)
+
+
+def test_scraper_uses_pooled_driver(pool, monkeypatch):
+    monkeypatch.setattr(LinkedInScraper, '_random_delay', lambda self, *args: None)
+    scraper = LinkedInScraper(pool=pool)
+
+    data = scraper.scrape_page('fakeco')
+    scraper.scrape_page('fakeco')
+
+    assert data['page_id'] == 'fakeco'
+    assert FakeDriver.created == 1
+    assert pool.idle_count() == 1
+
+
+def test_single_flight_shares_one_call():
+    from app.services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def slow_scrape():
+        calls.append(1)
+        started.set()
+        release.wait(1)
+        return 'acme'
+
+    def caller():
+        results.append(flight.do('acme', slow_scrape))
+
+    leader = threading.Thread(target=caller)
+    leader.start()
+    started.wait(1)
+    followers = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in followers:
+        thread.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(1)
+
+    assert len(calls) == 1
+    assert results == ['acme'] * 5
+    assert not flight.in_flight('acme')
+
+
+def test_single_flight_propagates_errors():
+    from app.services.single_flight import SingleFlight
+
+    flight = SingleFlight()
+
+    def failing():
+        raise RuntimeError('blocked')
+
+    with pytest.raises(RuntimeError):
+        flight.do('acme', failing)
+    assert flight.do('acme', lambda: 'retried') == 'retried'
+
+
+@pytest.fixture
+def app():
+    from app import create_app
+    from app.models import db
+    from tests.test_api import TestConfig
+
+    application = create_app(TestConfig)
+    with application.app_context():
+        db.create_all()
+        yield application
+        db.drop_all()
+
+
+def test_db_lock_waits_for_other_process(app):
+    from app.services.single_flight import SingleFlight, acquire_db_lock, release_db_lock
+
+    flight = SingleFlight()
+    flight.use_db_lock = True
+    flight.poll_interval = 0.01
+    flight.wait_timeout = 2
+
+    # another process holds the lock
+    assert acquire_db_lock('acme', 'other-process')
+    assert not acquire_db_lock('acme', 'someone-else')
+
+    def other_process_finishes():
+        with app.app_context():
+            release_db_lock('acme', 'other-process')
+
+    timer = threading.Timer(0.05, other_process_finishes)
+    timer.start()
+    calls = []
+    assert flight.do('acme', lambda: calls.append(1)) is None
+    timer.join()
+    assert calls == []
+
+    assert flight.do('acme', lambda: 'scraped') == 'scraped'
+    assert acquire_db_lock('acme', 'next')
+
+
+def test_db_lock_expired_is_taken_over(app):
+    from app.services.single_flight import acquire_db_lock
+
+    assert acquire_db_lock('acme', 'crashed', ttl=-1)
+    assert acquire_db_lock('acme', 'new-owner')
+
+
+def test_scraper_parallel_sections(monkeypatch):
+    FakeDriver.created = 0
+    pool = DriverPool(factory=FakeDriver, size=3, acquire_timeout=1)
+    # every section must reach the barrier before any can go on, which
+    # only happens if all three are running at once
+    barrier = threading.Barrier(3, timeout=2)
+    waited = set()
+    lock = threading.Lock()
+
+    def delay(self, *args):
+        with lock:
+            first = threading.get_ident() not in waited
+            waited.add(threading.get_ident())
+        if first:
+            barrier.wait()
+
+    monkeypatch.setattr(LinkedInScraper, '_random_delay', delay)
+    scraper = LinkedInScraper(pool=pool)
+
+    data = scraper.scrape_page('fakeco', parallel=True)
+
+    assert len(waited) == 3
+    assert FakeDriver.created == 3
+    assert data['page_id'] == 'fakeco'
+    assert data['name'] == 'Fake Co'
+    assert data['posts'] and data['employees']
+
+
+def test_domain_rate_limiter_spaces_requests(monkeypatch):
+    from app.services import rate_limiter
+
+    sleeps = []
+    monkeypatch.setattr(rate_limiter.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', lambda: 100.0)
+
+    limiter = rate_limiter.DomainRateLimiter(rate=2, burst=2)
+    waits = [limiter.wait('www.linkedin.com') for _ in range(4)]
+
+    assert waits == [0, 0, 0.5, 1.0]
+    assert sleeps == [0.5, 1.0]
+    assert limiter.wait('example.com') == 0
+
+
+def _count_statements(func):
+    from sqlalchemy import event
+    from app.models import db
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_save_statement_count_is_constant(app):
+    from app.models import Page, Post, Comment, User
+    from app.services.persistence import save_scraped_data
+    from benchmarks.bench_save import make_payload
+
+    small = _count_statements(lambda: save_scraped_data(make_payload('small', 2, 2)))
+    large = _count_statements(lambda: save_scraped_data(make_payload('large', 40, 40)))
+    refresh = _count_statements(lambda: save_scraped_data(make_payload('large', 40, 40)))
+
+    assert small == large
+    assert refresh <= large
+
+    page = Page.query.filter_by(page_id='large').first()
+    assert page.posts.count() == 40
+    assert Comment.query.join(Post).filter(Post.page_id == page.id).count() == 120
+    assert User.query.filter_by(company_id=page.id).count() == 40
+    assert User.query.count() == 42
+
+
+def test_refresh_writes_only_changes(app):
+    from sqlalchemy import event
+    from app.models import db, Post
+    from app.services.persistence import persist_scraped_data
+    from benchmarks.bench_save import make_payload
+
+    payload = make_payload('acme', 5, 3)
+    page, changes = persist_scraped_data(payload)
+    assert changes['posts']['added'] == 5
+    assert changes['employees']['added'] == 3
+    original_ids = dict((p.linkedin_post_id, p.id) for p in page.posts)
+
+    writes = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    payload = make_payload('acme', 5, 3)
+    payload['follower_count'] += 1
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        page, changes = persist_scraped_data(payload)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    # only the page row and its follower-based stats are written
+    assert len(writes) == 2 and writes[0].startswith('UPDATE pages')
+    assert writes[1].startswith('UPDATE page_stats')
+    assert changes['page_fields'] == ['follower_count']
+    assert changes['posts'] == {
+        'added': 0, 'updated': 0, 'retired': 0, 'unchanged': 5, 'comments_replaced': 0, 'content_changed': []
+    }
+    assert changes['employees'] == {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 3}
+
+    payload = make_payload('acme', 5, 3)
+    payload['posts'][0]['like_count'] = 999
+    payload['posts'][1]['comments'] = [{'author_name': 'New', 'content': 'First!'}]
+    payload['posts'].pop()
+    payload['posts'].append({'linkedin_post_id': 'acme_new', 'content': 'Fresh'})
+    payload['employees'].pop()
+
+    page, changes = persist_scraped_data(payload)
+    assert changes['posts'] == {
+        'added': 1, 'updated': 1, 'retired': 1, 'unchanged': 3, 'comments_replaced': 1,
+        'content_changed': ['acme_new', 'acme_4']
+    }
+    assert changes['employees']['removed'] == 1
+
+    posts = dict((p.linkedin_post_id, p) for p in Post.query.filter_by(page_id=page.id))
+    assert all(posts[key].id == post_id for key, post_id in original_ids.items())
+    assert posts['acme_0'].like_count == 999
+    assert [c.author_name for c in posts['acme_1'].comments] == ['New']
+    assert posts['acme_4'].retired_at is not None
+    assert posts['acme_new'].retired_at is None
+    assert page.employees.count() == 2
+
+
+def test_unchanged_scrape_skips_writes(app):
+    from sqlalchemy import event
+    from app.models import db
+    from app.services.persistence import persist_scraped_data
+    from benchmarks.bench_save import make_payload
+
+    page, changes = persist_scraped_data(make_payload('acme', 5, 3))
+    first_checked = page.last_checked_at
+    updated_at = page.updated_at
+    assert not changes['unchanged']
+    assert page.content_hash
+
+    writes = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        page, changes = persist_scraped_data(make_payload('acme', 5, 3))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert changes['unchanged']
+    assert len(writes) == 1 and 'last_checked_at' in writes[0]
+    assert page.last_checked_at > first_checked
+    assert page.updated_at == updated_at
+
+
+def test_next_day_refresh_is_unchanged(app):
+    from datetime import timedelta
+    from sqlalchemy import event
+    from app.models import db
+    from app.services.cache_service import get_generation
+    from app.services.persistence import persist_scraped_data
+    from benchmarks.bench_save import make_payload
+
+    page, changes = persist_scraped_data(make_payload('acme', 5, 3))
+    updated_at = page.updated_at
+    generation = get_generation('pages_list')
+
+    writes = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith('SELECT'):
+            writes.append(statement)
+
+    # a refresh the next day estimates every posted_at a day later
+    payload = make_payload('acme', 5, 3)
+    for post in payload['posts']:
+        post['posted_at'] += timedelta(days=1)
+        for comment in post['comments']:
+            comment['commented_at'] = post['posted_at']
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        page, changes = persist_scraped_data(payload)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert changes['unchanged']
+    assert len(writes) == 1 and 'last_checked_at' in writes[0]
+
+    # hashed but not stored: syncing finds nothing to write
+    payload['employees'].append(dict(payload['employees'][0]))
+    writes.clear()
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        page, changes = persist_scraped_data(payload)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert changes['unchanged']
+    assert changes['posts']['unchanged'] == 5
+    assert len(writes) == 1 and 'content_hash' in writes[0]
+    assert page.updated_at == updated_at
+    assert get_generation('pages_list') == generation
+
+
+def _route_statements(app, urls):
+    """The SELECTs the routes emit for urls, with their parameters"""
+    from sqlalchemy import event
+    from app.models import db
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    client = app.test_client()
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        for url in urls:
+            assert client.get(url).status_code == 200, url
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return statements
+
+
+def _next_cursor(app, url):
+    return app.test_client().get(f'{url}&cursor=').get_json()['data']['pagination']['next_cursor']
+
+
+def test_hot_queries_use_indexes(app):
+    import re
+    from app.models import db
+    from app.services.cache_service import clear_all_cache
+    from app.services.persistence import persist_scraped_data
+    from app.services.rankings import rebuild_rankings
+    from benchmarks.bench_save import make_payload
+
+    for page_id, industry in (('acme', 'Software'), ('globex', 'Retail')):
+        payload = make_payload(page_id, 6, 4)
+        payload['industry'] = industry
+        persist_scraped_data(payload)
+    rebuild_rankings()
+
+    pages_url = '/api/pages/?per_page=1'
+    posts_url = '/api/pages/acme/posts?per_page=2'
+    employees_url = '/api/pages/acme/employees?per_page=2'
+    urls = [
+        pages_url, '/api/pages/?follower_range=10k-50k', '/api/pages/?industry=software',
+        posts_url, employees_url, '/api/pages/acme/followers',
+        '/api/pages/acme?include_posts=true&include_employees=true',
+        '/api/export/posts.ndjson?page_id=acme',
+        '/api/leaderboards/?metric=engagement_rate', '/api/leaderboards/pages/acme',
+    ]
+    # the keyset path of each listing, from a real cursor
+    urls += [f'{url}&cursor={_next_cursor(app, url)}' for url in (pages_url, posts_url, employees_url)]
+
+    clear_all_cache()
+    statements = _route_statements(app, urls)
+    assert any('ORDER BY posts.posted_at DESC, posts.id DESC' in sql for sql, params in statements)
+
+    for sql, params in statements:
+        # the industry filter matches a substring of the small lookup table's keys
+        if 'FROM industries' in sql:
+            continue
+        plan = [row[-1] for row in db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {sql}', params)]
+        # min()/max() over an unindexed column shows as a bare SEARCH
+        full_scans = [step for step in plan if re.fullmatch(r'(SCAN|SEARCH) \w+', step)]
+        sorts = [step for step in plan if 'TEMP B-TREE' in step]
+        assert not full_scans, f"full scan: {plan}\n{sql}"
+        assert not sorts, f"sort without an index: {plan}\n{sql}"
+
+
+SHARED_CACHE = {}
+
+
+class SharedMemoryCache(SimpleCache):
+    """Stand-in for a networked cache: every instance sees the same dict"""
+
+    def __init__(self, key_prefix='', **kwargs):
+        super().__init__(**kwargs)
+        self._cache = SHARED_CACHE
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def factory(cls, app, config, args, kwargs):
+        kwargs['key_prefix'] = config['CACHE_KEY_PREFIX']
+        return super().factory(app, config, args, kwargs)
+
+    def get(self, key):
+        return super().get(self.key_prefix + key)
+
+    def set(self, key, value, timeout=None):
+        return super().set(self.key_prefix + key, value, timeout)
+
+    def add(self, key, value, timeout=None):
+        return super().add(self.key_prefix + key, value, timeout)
+
+    def delete(self, key):
+        return super().delete(self.key_prefix + key)
+
+    def has(self, key):
+        return super().has(self.key_prefix + key)
+
+
+@pytest.fixture
+def shared_workers():
+    """Two app instances sharing one cache backend, like two gunicorn workers"""
+    from app import create_app
+    from tests.test_api import TestConfig
+
+    class SharedCacheConfig(TestConfig):
+        CACHE_TYPE = 'tests.test_services.SharedMemoryCache'
+        CACHE_KEY_PREFIX = 'li_test:'
+        CACHE_L1_TIMEOUT = 0.2
+
+    SHARED_CACHE.clear()
+    yield create_app(SharedCacheConfig), create_app(SharedCacheConfig)
+    SHARED_CACHE.clear()
+
+
+def test_shared_cache_is_seen_by_other_workers(shared_workers):
+    from app.services.cache_service import (
+        local_cache, get_cached_page, set_cached_page, clear_page_cache, bump_generation, get_generation
+    )
+
+    worker_a, worker_b = shared_workers
+
+    with worker_a.app_context():
+        set_cached_page('acme', {'name': 'Acme'})
+        generation = get_generation('pages')
+        bump_generation('pages')
+
+    # keys are namespaced in the shared backend
+    assert set(SHARED_CACHE) == {'li_test:page_acme', 'li_test:gen_pages'}
+
+    # a separate process has its own, empty L1
+    local_cache.clear()
+    with worker_b.app_context():
+        assert get_cached_page('acme') == {'name': 'Acme'}
+        assert get_generation('pages') == generation + 1
+
+    with worker_a.app_context():
+        clear_page_cache('acme')
+    local_cache.clear()
+    with worker_b.app_context():
+        assert get_cached_page('acme') is None
+
+
+def test_local_cache_fronts_shared_backend(shared_workers):
+    from app.services.cache_service import cache, cache_get, cache_set
+
+    worker_a, worker_b = shared_workers
+
+    with worker_a.app_context():
+        cache_set('greeting', 'hello')
+        # written behind the L1's back, as another worker would
+        cache.set('greeting', 'hi')
+        assert cache_get('greeting') == 'hello'
+
+        time.sleep(0.25)
+        assert cache_get('greeting') == 'hi'
+
+
+def test_local_cache_is_off_for_in_process_backend(app):
+    from app.services.cache_service import local_cache, cache, cache_get, cache_set
+
+    cache_set('greeting', 'hello')
+    cache.set('greeting', 'hi')
+    assert local_cache.timeout == 0
+    assert cache_get('greeting') == 'hi'
+
+
+def test_scraper_pool_timeout_is_not_mocked(monkeypatch):
+    FakeDriver.created = 0
+    pool = DriverPool(factory=FakeDriver, size=1, acquire_timeout=0.05)
+    scraper = LinkedInScraper(pool=pool)
+
+    with pool.lease():
+        with pytest.raises(DriverPoolTimeout):
+            scraper.scrape_page('fakeco')
+        with pytest.raises(DriverPoolTimeout):
+            scraper.scrape_page('fakeco', parallel=True)
+
+
+def test_scraper_driver_crash_propagates_and_replaces_driver(pool, monkeypatch):
+    from selenium.common.exceptions import WebDriverException
+
+    monkeypatch.setattr(LinkedInScraper, '_random_delay', lambda self, *args: None)
+    scraper = LinkedInScraper(pool=pool)
+
+    def crash(self, url):
+        self.alive = False
+        raise WebDriverException('chrome not reachable')
+
+    monkeypatch.setattr(FakeDriver, 'get', crash)
+    with pytest.raises(WebDriverException):
+        scraper.scrape_page('fakeco')
+
+    # the crashed session was discarded rather than returned to the pool
+    assert pool.idle_count() == 0
+    monkeypatch.undo()
+    monkeypatch.setattr(LinkedInScraper, '_random_delay', lambda self, *args: None)
+    assert scraper.scrape_page('fakeco')['name'] == 'Fake Co'
+    assert FakeDriver.created == 2
+
+
+def test_jobs_are_shared_across_workers(shared_workers):
+    from app.services.job_queue import JobQueue
+
+    worker_a, worker_b = shared_workers
+    queue_a, queue_b = JobQueue(), JobQueue()
+    queue_a.init_app(worker_a)
+    queue_b.init_app(worker_b)
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def blocking(job):
+        started.set()
+        release.wait(2)
+        return {'page_id': job.page_id}
+
+    with worker_a.app_context():
+        job, created = queue_a.submit_unique('acme', blocking)
+    assert created
+    assert started.wait(2)
+
+    # another process sees the running job and does not queue a second one
+    with worker_b.app_context():
+        assert queue_b.get(job.id).status == 'running'
+        other, created = queue_b.submit_unique('acme', blocking)
+        assert not created and other.id == job.id
+
+    release.set()
+    queue_a.shutdown(wait=True)
+
+    with worker_b.app_context():
+        finished = queue_b.get(job.id)
+        assert finished.status == 'completed'
+        assert finished.result == {'page_id': 'acme'}
+        assert queue_b.find_active('acme') is None
+
+        # the page's claim was released, so a new job can be queued
+        queue_b.eager = True
+        again, created = queue_b.submit_unique('acme', lambda job: None)
+        assert created and again.id != job.id